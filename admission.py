@@ -0,0 +1,187 @@
+"""
+Admission control for agent runs
+
+Decides per request whether to run the full agent, serve a degraded
+answer or shed the work, based on how much agent work is queued, the
+recent answer latency and a circuit breaker around the model backend.
+"""
+
+import threading
+import time
+
+import config
+from metrics import metrics
+
+
+# Request priorities
+HIGH = "high"      # Someone is explicitly waiting (slash commands, DMs)
+NORMAL = "normal"  # Channel mentions
+LOW = "low"        # Background work (cache warming, thread summaries)
+
+# Admission decisions
+ADMIT = "admit"
+DEGRADE = "degrade"
+SHED = "shed"
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed because the bot is overloaded"""
+
+
+class CircuitOpenError(OverloadedError):
+    """Raised when the model backend circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing backend for a while
+
+    After failure_threshold consecutive failures the breaker opens and
+    rejects calls. Once reset_timeout has passed a single trial call is
+    let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = config.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = config.BREAKER_RESET_TIMEOUT
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Check whether a call may go to the backend now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            with self._lock:
+                if not self._trial_running:
+                    self._trial_running = True
+                    return True
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    metrics.increment("admission.breaker_opened")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class AdmissionController:
+    """Track agent load and latency and decide how to serve each request"""
+
+    def __init__(self, queue, breaker: CircuitBreaker = None):
+        """
+        Args:
+            queue: AgentQueue whose waiting jobs count towards the load
+            breaker: Circuit breaker around the model backend
+        """
+        self.queue = queue
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency = 0.0
+        self._latency_at = 0.0
+
+    @property
+    def load(self) -> int:
+        """Agent calls running now plus jobs waiting on the queue"""
+        return self._in_flight + self.queue.pending
+
+    @property
+    def recent_latency(self) -> float:
+        """Moving average of agent latency, 0 if there is no recent sample"""
+        if time.monotonic() - self._latency_at > config.ADMISSION_LATENCY_STALE:
+            return 0.0
+        return self._latency
+
+    def decide(self, priority: str = NORMAL) -> str:
+        """
+        Decide how to serve a request
+
+        Args:
+            priority: HIGH, NORMAL or LOW
+
+        Returns:
+            ADMIT, DEGRADE or SHED
+        """
+        load, latency = self.load, self.recent_latency
+        busy = load >= config.ADMISSION_SOFT_QUEUE or latency >= config.ADMISSION_SOFT_LATENCY
+        overloaded = load >= config.ADMISSION_HARD_QUEUE or latency >= config.ADMISSION_HARD_LATENCY
+        saturated = load >= config.ADMISSION_HIGH_QUEUE or latency >= config.ADMISSION_HIGH_LATENCY
+        breaker_open = self.breaker.state == CircuitBreaker.OPEN
+
+        if priority == LOW:
+            decision = SHED if busy or breaker_open else ADMIT
+        elif priority == HIGH:
+            # Someone is waiting on these; keep full answers well past the
+            # point where channel mentions are degraded
+            decision = DEGRADE if breaker_open or saturated else ADMIT
+        elif breaker_open or overloaded:
+            decision = DEGRADE
+        else:
+            decision = ADMIT
+
+        if decision != ADMIT:
+            metrics.increment(f"admission.{decision}", priority=priority)
+        return decision
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run a backend call, tracking its latency and outcome
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Model backend is unavailable")
+
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                alpha = config.ADMISSION_LATENCY_ALPHA
+                if self.recent_latency:
+                    self._latency = alpha * elapsed + (1 - alpha) * self._latency
+                else:
+                    self._latency = elapsed
+                self._latency_at = time.monotonic()
+            metrics.observe("admission.backend_seconds", elapsed)
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypedDict, Annotated, Sequence
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 
@@ -5,29 +6,83 @@ from langchain_community.chat_models import ChatOllama
 
 
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolExecutor
+from langgraph.prebuilt import ToolExecutor, ToolInvocation
 import operator
 
+import config
+from marketing_tools import (
+    MARKETING_TOOLS,
+    TOOL_PLANNING_PROMPT,
+    ToolResultCache,
+    describe_tools,
+    execute_tool_calls,
+    format_tool_results,
+    needs_tools,
+    parse_tool_calls,
+)
+from pipeline import LinearPipeline
+
 
 class AgentState(TypedDict):
 
     messages: Annotated[Sequence[BaseMessage], operator.add]
     user_info: dict
     channel_info: dict
+    question: str  # The user's question alone, without thread or CSV preamble
+    data_context: str  # Metrics already computed from attached campaign files
+    tool_results: list
     
 class SlackAIAgent:
-    def __init__(self, model_name="llama3:8b", temperature=0.7):
+    def __init__(self, model_name="llama3:8b", temperature=0.7, backend="ollama", executor="langgraph", max_tokens=None):
         if not model_name:
-            raise ValueError("Ollama model name is missing")
-
-        self.llm = ChatOllama(
-            model=model_name,        # 👈 THIS IS CRITICAL
-            temperature=temperature
-        )
-
-        self.graph = self._create_graph()
-
-
+            raise ValueError("Model name is missing")
+
+        self.llm = self._create_llm(backend, model_name, temperature, max_tokens)
+        # Tool plans are short JSON; plan deterministically with a small cap
+        self.planner_llm = self._create_llm(backend, model_name, 0.0, config.TOOL_PLAN_MAX_TOKENS)
+
+        self.tool_executor = ToolExecutor(MARKETING_TOOLS)
+        self.tool_pool = ThreadPoolExecutor(max_workers=config.TOOL_WORKERS, thread_name_prefix="agent-tool")
+        self.tool_cache = ToolResultCache()
+        self.tool_descriptions = describe_tools()
+
+        # "linear" skips the LangGraph runtime for this straight-line graph
+        if executor == "linear":
+            self.graph = self._create_pipeline()
+        elif executor == "langgraph":
+            self.graph = self._create_graph()
+        else:
+            raise ValueError(f"Unknown executor: {executor}")
+
+
+
+    @staticmethod
+    def _create_llm(backend: str, model_name: str, temperature: float, max_tokens=None):
+        """Create the chat model for a backend"""
+        if backend == "local":
+            # Imported lazily so the Ollama path doesn't need torch
+            from local_backend import LocalChatModel
+
+            return LocalChatModel(
+                model_name=model_name,
+                temperature=temperature,
+                max_new_tokens=max_tokens or config.LOCAL_MAX_NEW_TOKENS
+            )
+        if backend == "ollama":
+            return ChatOllama(
+                model=model_name,        # 👈 THIS IS CRITICAL
+                temperature=temperature,
+                num_predict=max_tokens
+            )
+        raise ValueError(f"Unknown model backend: {backend}")
+
+    def _create_pipeline(self) -> LinearPipeline:
+        """Same nodes as _create_graph, run by the minimal executor"""
+        return LinearPipeline(AgentState, [
+            ("process_message", self._process_message),
+            ("call_tools", self._call_tools),
+            ("generate_response", self._generate_response),
+        ])
 
     def _create_graph(self) -> StateGraph:
 
@@ -35,11 +90,13 @@ class SlackAIAgent:
         
         # Define nodes
         workflow.add_node("process_message", self._process_message)
+        workflow.add_node("call_tools", self._call_tools)
         workflow.add_node("generate_response", self._generate_response)
         
         # Define edges
         workflow.set_entry_point("process_message")
-        workflow.add_edge("process_message", "generate_response")
+        workflow.add_edge("process_message", "call_tools")
+        workflow.add_edge("call_tools", "generate_response")
         workflow.add_edge("generate_response", END)
         
         return workflow.compile()
@@ -57,26 +114,51 @@ class SlackAIAgent:
         if not messages or not isinstance(messages[0], SystemMessage):
             messages = [SystemMessage(content=system_prompt)] + list(messages)
         
-        return {
-            "messages": messages,
-            "user_info": user_info,
-            "channel_info": channel_info
-        }
+        # Only return what changed; user_info/channel_info are already set
+        return {"messages": messages}
+
+    def _call_tools(self, state: AgentState) -> AgentState:
+        """Plan tool calls in one model turn and run them concurrently"""
+        # Campaign files were already aggregated; the numbers are in the prompt
+        if state.get("data_context"):
+            return {}
+
+        # Plan from the question alone so thread history doesn't trigger or bloat planning
+        question = state.get("question") or state["messages"][-1].content
+        # Without numbers or a framework name there is nothing for a tool to do
+        if not needs_tools(question):
+            return {}
+
+        plan = self.planner_llm.invoke(TOOL_PLANNING_PROMPT.format(tools=self.tool_descriptions, question=question))
+        calls = parse_tool_calls(plan.content)
+        if not calls:
+            return {}
+
+        results = execute_tool_calls(calls, self._invoke_tool, self.tool_pool, self.tool_cache)
+        return {"tool_results": results}
+
+    def _invoke_tool(self, name: str, args: dict):
+        """Run one registered tool"""
+        return self.tool_executor.invoke(ToolInvocation(tool=name, tool_input=args))
     
     def _generate_response(self, state: AgentState) -> AgentState:
         """Generate AI response using LLM"""
         messages = state["messages"]
+        prompt = messages[-1].content
+
+        tool_results = state.get("tool_results")
+        if tool_results:
+            prompt += (
+                "\n\nTool results (computed exactly; use these numbers rather than recalculating):\n"
+                + format_tool_results(tool_results)
+            )
         
         # Generate response
         # response = self.llm.invoke(messages)
-        response = self.llm.invoke(messages[-1].content)
+        response = self.llm.invoke(prompt)
 
         
-        return {
-            "messages": [response],
-            "user_info": state["user_info"],
-            "channel_info": state["channel_info"]
-        }
+        return {"messages": [response]}
 
 
 
@@ -107,12 +189,30 @@ Guidelines:
 
 Remember: You're a marketing expert here to help the team succeed!"""
     
-    def run(self, message: str, user_info: dict = None, channel_info: dict = None) -> str:
-        """Run the agent and get response"""
+    def run(
+        self,
+        message: str,
+        user_info: dict = None,
+        channel_info: dict = None,
+        question: str = None,
+        data_context: str = ""
+    ) -> str:
+        """
+        Run the agent and get response
+
+        Args:
+            message: Full prompt text (may include thread and data context)
+            user_info: Slack user profile
+            channel_info: Slack channel details
+            question: The bare question, used for tool planning (defaults to message)
+            data_context: Campaign metrics included in message, if any
+        """
         initial_state = {
             "messages": [HumanMessage(content=message)],
             "user_info": user_info or {},
-            "channel_info": channel_info or {}
+            "channel_info": channel_info or {},
+            "question": question or message,
+            "data_context": data_context
         }
         
         result = self.graph.invoke(initial_state)
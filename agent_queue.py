@@ -0,0 +1,94 @@
+"""
+Execution queue for agent runs
+
+Slack listeners hand slow work (model calls) to this queue so that the
+Bolt listener threads are free to ack new events immediately.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import config
+from metrics import metrics
+
+
+class AgentQueue:
+    """Bounded worker pool that tracks how much work is waiting"""
+
+    def __init__(self, max_workers: int = config.AGENT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agent-worker"
+        )
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._pending = 0
+        self._local = threading.local()
+
+    @property
+    def depth(self) -> int:
+        """Number of submitted jobs that have not finished yet"""
+        return self._depth
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted jobs still waiting for a worker"""
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queue a job for execution
+
+        Args:
+            fn: Callable to run on a worker thread
+            *args, **kwargs: Arguments for the callable
+
+        Returns:
+            Future for the job's result
+        """
+        with self._lock:
+            self._depth += 1
+            self._pending += 1
+        metrics.observe("agent_queue.depth", self._depth)
+
+        future = self._executor.submit(self._run_job, fn, args, kwargs)
+        future.add_done_callback(self._job_done)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run a job on the queue and wait for its result
+
+        Jobs started from a queue worker (e.g. events dispatched in HTTP
+        mode) run inline, so a worker never blocks waiting on the queue.
+
+        Args:
+            fn: Callable to run
+            *args, **kwargs: Arguments for the callable
+
+        Returns:
+            The callable's result
+        """
+        if getattr(self._local, "is_worker", False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run_job(self, fn, args, kwargs):
+        self._local.is_worker = True
+        with self._lock:
+            self._pending -= 1
+        return fn(*args, **kwargs)
+
+    def _job_done(self, future: Future):
+        with self._lock:
+            self._depth -= 1
+            if future.cancelled():
+                self._pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running jobs"""
+        self._executor.shutdown(wait=wait)
+
+
+# Shared queue used by all Slack handlers
+agent_queue = AgentQueue()
@@ -0,0 +1,111 @@
+"""
+Compare the Ollama and in-process model backends under concurrent load
+
+Usage:
+    python -m benchmarks.bench_backends --requests 16 --concurrency 1 4 8
+
+Each backend answers the same marketing prompts while streaming, and the
+benchmark reports time to first token, per-request latency and aggregate
+token throughput for every concurrency level.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.chat_models import ChatOllama
+
+import config
+from context_compaction import count_tokens
+
+
+PROMPTS = [
+    "Give me three ideas for a LinkedIn post announcing our new analytics dashboard.",
+    "How do I calculate ROAS and what is a good target for e-commerce?",
+    "Outline a Q1 content strategy for a B2B SaaS startup.",
+    "What KPIs should I track for an email nurture campaign?",
+]
+
+
+def build_model(backend: str, args):
+    """Create the chat model for a backend"""
+    if backend == "local":
+        from local_backend import LocalChatModel, get_batcher
+
+        start = time.perf_counter()
+        get_batcher(args.local_model, args.quantize, args.max_batch_size)
+        print(f"local: weights loaded in {time.perf_counter() - start:.1f}s")
+        return LocalChatModel(
+            model_name=args.local_model,
+            quantize=args.quantize,
+            max_batch_size=args.max_batch_size,
+            max_new_tokens=args.max_tokens,
+            temperature=0
+        )
+
+    return ChatOllama(model=args.ollama_model, temperature=0, num_predict=args.max_tokens)
+
+
+def timed_stream(model, prompt: str) -> dict:
+    """Stream one answer, recording time to first token and total latency"""
+    start = time.perf_counter()
+    first_token = None
+    pieces = []
+    for chunk in model.stream(prompt):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        pieces.append(chunk.content)
+    total = time.perf_counter() - start
+    return {
+        "ttft": first_token or total,
+        "latency": total,
+        "tokens": count_tokens("".join(pieces)),
+    }
+
+
+def run_level(model, requests: int, concurrency: int) -> dict:
+    """Run a batch of requests at a fixed concurrency"""
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda p: timed_stream(model, p), prompts))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r["latency"] for r in results)
+    return {
+        "ttft_p50": statistics.median(r["ttft"] for r in results),
+        "latency_p50": statistics.median(latencies),
+        "latency_p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "tokens_per_sec": sum(r["tokens"] for r in results) / wall,
+        "requests_per_sec": requests / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["ollama", "local"], choices=["ollama", "local"])
+    parser.add_argument("--ollama-model", default=config.OLLAMA_MODEL_NAME)
+    parser.add_argument("--local-model", default=config.LOCAL_MODEL_NAME)
+    parser.add_argument("--quantize", action="store_true", default=config.LOCAL_QUANTIZE)
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false")
+    parser.add_argument("--max-batch-size", type=int, default=config.LOCAL_MAX_BATCH_SIZE)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'conc':>4} {'ttft p50':>9} {'lat p50':>8} {'lat p95':>8} {'tok/s':>7} {'req/s':>6}")
+    for backend in args.backends:
+        model = build_model(backend, args)
+        timed_stream(model, PROMPTS[0])  # Warm-up
+        for concurrency in args.concurrency:
+            r = run_level(model, args.requests, concurrency)
+            print(
+                f"{backend:<8} {concurrency:>4} {r['ttft_p50']:>8.2f}s {r['latency_p50']:>7.2f}s "
+                f"{r['latency_p95']:>7.2f}s {r['tokens_per_sec']:>7.1f} {r['requests_per_sec']:>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
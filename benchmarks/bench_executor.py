@@ -0,0 +1,83 @@
+"""
+Per-request overhead of the LangGraph and linear pipeline executors
+
+Usage:
+    python -m benchmarks.bench_executor --requests 2000
+
+Both agents are run with a fake chat model so the numbers isolate graph
+execution and state handling from model latency. Reports mean time per
+request and peak memory allocated per request (via tracemalloc).
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from langchain_core.language_models import FakeListChatModel
+
+from agent import SlackAIAgent
+
+
+def build_agent(kind: str, executor: str):
+    """Create an agent whose model answers instantly"""
+    if kind == "enhanced":
+        # ChatOpenAI validates the key at construction; it is never used
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        from enhanced_agent import EnhancedMarketingAgent
+        agent = EnhancedMarketingAgent(executor=executor)
+    else:
+        agent = SlackAIAgent(executor=executor)
+
+    agent.llm = FakeListChatModel(responses=["Focus on ROAS by channel and cut the bottom quartile."])
+    return agent
+
+
+def measure(agent, requests: int) -> dict:
+    """Time requests, then measure allocation peaks on a smaller sample"""
+    query = "How should we split next quarter's ad budget between search and social?"
+    user_info = {"real_name": "Bench"}
+    channel_info = {"name": "marketing"}
+
+    for _ in range(50):  # Warm-up
+        agent.run(query, user_info=user_info, channel_info=channel_info)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        agent.run(query, user_info=user_info, channel_info=channel_info)
+    per_request = (time.perf_counter() - start) / requests
+
+    samples = min(requests, 200)
+    peaks = []
+    tracemalloc.start()
+    for _ in range(samples):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        agent.run(query, user_info=user_info, channel_info=channel_info)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        "us_per_request": per_request * 1e6,
+        "peak_kib_per_request": sum(peaks) / len(peaks) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", nargs="+", default=["basic", "enhanced"], choices=["basic", "enhanced"])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'agent':<9} {'executor':<10} {'us/request':>11} {'peak KiB/request':>17}")
+    for kind in args.agents:
+        for executor in ("langgraph", "linear"):
+            result = measure(build_agent(kind, executor), args.requests)
+            print(
+                f"{kind:<9} {executor:<10} {result['us_per_request']:>11.1f} "
+                f"{result['peak_kib_per_request']:>17.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
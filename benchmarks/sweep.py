@@ -0,0 +1,309 @@
+"""
+Latency/quality sweep over model and generation settings
+
+Usage:
+    python -m benchmarks.sweep --backend ollama --models llama3:8b llama3.2:3b llama3.2:1b \\
+        --max-tokens 256 512 --context-tokens 0 1500 --prompt-variants scenario concise
+
+Runs a fixed marketing query set, a few questions per SYSTEM_PROMPTS
+scenario, for every combination of model, max-token cap, thread context
+size (what CONTEXT_TOKEN_BUDGET admits) and system prompt variant. For
+each combination it records time to first token, decode tokens/sec,
+total latency, memory footprint and a cheap quality score, then marks the
+Pareto-optimal settings (lower latency and memory, higher quality).
+
+Quality is keyword coverage of points a good answer should mention, with
+a penalty for answers cut off by the token cap. It is only good for
+ranking settings against each other; read the saved answers in
+results.jsonl before changing production defaults.
+
+Memory is the model's resident size: the RSS growth of this process for
+the local backend, or the size Ollama reports for the loaded model.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import statistics
+import time
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import config
+from context_compaction import count_tokens, truncate_to_tokens
+
+
+# Per scenario: (question, points a good answer mentions)
+QUERIES = {
+    "strategy": [
+        ("How should a B2B SaaS startup position itself against two larger competitors?",
+         ["differentiat", "segment", "value proposition", "competitor", "pricing", "niche"]),
+        ("Draft a 12-month growth strategy for a DTC skincare brand.",
+         ["retention", "acquisition", "channel", "budget", "quarter", "brand"]),
+    ],
+    "analytics": [
+        ("We spent $20,000 on ads, got 400 customers and $90,000 revenue. What are our CAC and ROAS?",
+         ["cac", "roas", "50", "4.5", "ltv"]),
+        ("Which KPIs should we track for an email nurture campaign, and what are good benchmarks?",
+         ["open rate", "click", "conversion", "unsubscribe", "benchmark"]),
+    ],
+    "content": [
+        ("Plan a one-month content calendar for launching a project management tool.",
+         ["week", "blog", "social", "email", "launch", "seo"]),
+        ("How do we improve the SEO of our product pages?",
+         ["keyword", "meta", "internal link", "schema", "page speed", "content"]),
+    ],
+    "default": [
+        ("Give me three subject lines for our spring sale email.",
+         ["spring", "sale", "%"]),
+        ("What is the difference between brand awareness and demand generation?",
+         ["awareness", "demand", "funnel", "lead", "long-term"]),
+    ],
+}
+
+PROMPT_VARIANTS = {
+    "scenario": lambda scenario: config.SYSTEM_PROMPTS[scenario],
+    "concise": lambda scenario: (
+        config.SYSTEM_PROMPTS[scenario]
+        + "\nAnswer in at most 5 short bullet points suitable for Slack."
+    ),
+    "none": lambda scenario: None,
+}
+
+# Synthetic thread history used to fill the context budget
+THREAD_FILLER = (
+    "Alex: Our paid social CPMs went up 30% this month, mostly on Instagram.\n"
+    "Sam: Search is steady, CPC around $2.10, conversion rate 3.4%.\n"
+    "Alex: Leadership wants a plan to hit 500 new customers next quarter without raising spend.\n"
+    "Priya: The webinar series drove 120 SQLs last quarter, best cost per lead we have.\n"
+    "Sam: Email list is 48k, open rate 22%, but clicks dropped after the redesign.\n"
+)
+
+
+def build_model(backend: str, model_name: str, max_tokens: int, temperature: float, args):
+    """Create a chat model for one grid point"""
+    if backend == "local":
+        from local_backend import LocalChatModel
+
+        return LocalChatModel(
+            model_name=model_name,
+            quantize=args.quantize,
+            max_new_tokens=max_tokens,
+            temperature=temperature
+        )
+
+    from langchain_community.chat_models import ChatOllama
+
+    return ChatOllama(
+        model=model_name,
+        base_url=args.ollama_url,
+        temperature=temperature,
+        num_predict=max_tokens
+    )
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+def ollama_model_mb(base_url: str, model_name: str) -> float:
+    """Size of a loaded model as reported by the Ollama server"""
+    try:
+        response = httpx.get(f"{base_url}/api/ps", timeout=5)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return float("nan")
+    for model in response.json().get("models", []):
+        if model.get("name") == model_name or model.get("model") == model_name:
+            return model.get("size", 0) / (1 << 20)
+    return float("nan")
+
+
+def build_messages(scenario: str, question: str, variant: str, context_tokens: int) -> list:
+    """System prompt variant plus question, with thread context when requested"""
+    messages = []
+    system_prompt = PROMPT_VARIANTS[variant](scenario)
+    if system_prompt:
+        messages.append(SystemMessage(content=system_prompt))
+
+    if context_tokens:
+        repeats = context_tokens // max(count_tokens(THREAD_FILLER), 1) + 1
+        history = truncate_to_tokens(THREAD_FILLER * repeats, context_tokens)
+        question = f"Thread context:\n{history}\n\nQuestion: {question}"
+    messages.append(HumanMessage(content=question))
+    return messages
+
+
+def quality_score(answer: str, expected: list, tokens: int, max_tokens: int) -> float:
+    """
+    Cheap automatic quality score in [0, 1]
+
+    Args:
+        answer: Model output
+        expected: Lowercase substrings a good answer contains
+        tokens: Tokens generated
+        max_tokens: The token cap the answer ran under
+
+    Returns:
+        0.8 x keyword coverage + 0.2 if the answer finished before the cap
+    """
+    text = answer.lower()
+    coverage = sum(1 for keyword in expected if keyword in text) / len(expected)
+    finished = tokens < max_tokens * 0.95 or bool(re.search(r"[.!?)]\s*$", answer))
+    return round(0.8 * coverage + (0.2 if finished else 0.0), 3)
+
+
+def timed_stream(model, messages: list) -> dict:
+    """Stream one answer, recording time to first token and total latency"""
+    start = time.perf_counter()
+    first_token = None
+    pieces = []
+    for chunk in model.stream(messages):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        pieces.append(chunk.content)
+    total = time.perf_counter() - start
+    answer = "".join(pieces)
+    tokens = count_tokens(answer)
+    ttft = first_token or total
+    return {
+        "answer": answer,
+        "ttft": ttft,
+        "latency": total,
+        "tokens": tokens,
+        "tokens_per_sec": tokens / (total - ttft) if total > ttft else 0.0,
+    }
+
+
+def pareto_front(rows: list) -> list:
+    """Rows not dominated on (latency, memory, -quality)"""
+    def objectives(row):
+        memory = row["memory_mb"] if row["memory_mb"] == row["memory_mb"] else 0.0  # NaN -> unknown
+        return (row["latency_p50"], memory, -row["quality"])
+
+    front = []
+    for row in rows:
+        mine = objectives(row)
+        dominated = any(
+            all(o <= m for o, m in zip(objectives(other), mine)) and objectives(other) != mine
+            for other in rows
+        )
+        if not dominated:
+            front.append(row)
+    return front
+
+
+def write_report(path: str, rows: list, front: list, args):
+    """Markdown summary with the Pareto set first"""
+    header = (
+        "| model | max tokens | context | prompt | TTFT p50 (s) | latency p50 (s) | tok/s | memory (MB) | quality |\n"
+        "|---|---:|---:|---|---:|---:|---:|---:|---:|\n"
+    )
+
+    def line(row):
+        return (
+            f"| {row['model']} | {row['max_tokens']} | {row['context_tokens']} | {row['prompt_variant']} "
+            f"| {row['ttft_p50']:.2f} | {row['latency_p50']:.2f} | {row['tokens_per_sec']:.1f} "
+            f"| {row['memory_mb']:.0f} | {row['quality']:.2f} |\n"
+        )
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# Sweep report ({args.backend} backend, {len(rows)} settings)\n\n")
+        f.write("## Pareto-optimal settings (latency, memory, quality)\n\n" + header)
+        for row in sorted(front, key=lambda r: r["latency_p50"]):
+            f.write(line(row))
+        f.write("\n## All settings\n\n" + header)
+        for row in sorted(rows, key=lambda r: r["latency_p50"]):
+            f.write(line(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["ollama", "local"], default=config.AI_BACKEND)
+    parser.add_argument("--models", nargs="+", help="Model names (default: the backend's configured model)")
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[256, 512, config.AI_MAX_TOKENS])
+    parser.add_argument("--context-tokens", type=int, nargs="+", default=[0, config.CONTEXT_TOKEN_BUDGET])
+    parser.add_argument("--prompt-variants", nargs="+", default=list(PROMPT_VARIANTS), choices=list(PROMPT_VARIANTS))
+    parser.add_argument("--scenarios", nargs="+", default=list(QUERIES), choices=list(QUERIES))
+    parser.add_argument("--temperature", type=float, default=0.0, help="0 keeps runs comparable")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per query and setting")
+    parser.add_argument("--ollama-url", default="http://localhost:11434")
+    parser.add_argument("--quantize", action="store_true", default=config.LOCAL_QUANTIZE)
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false")
+    parser.add_argument("--output-dir", default="data/sweep")
+    args = parser.parse_args()
+
+    models = args.models or [config.LOCAL_MODEL_NAME if args.backend == "local" else config.OLLAMA_MODEL_NAME]
+    queries = [(scenario, q, expected) for scenario in args.scenarios for q, expected in QUERIES[scenario]]
+    os.makedirs(args.output_dir, exist_ok=True)
+    results_path = os.path.join(args.output_dir, "results.jsonl")
+
+    rows = []
+    with open(results_path, "w", encoding="utf-8") as results_file:
+        for model_name in models:
+            # Load the model (and its memory) before timing anything
+            baseline_rss = current_rss_mb()
+            warm = build_model(args.backend, model_name, 8, args.temperature, args)
+            warm.invoke("Hello")
+            peak_rss = current_rss_mb()
+
+            grid = itertools.product(args.max_tokens, args.context_tokens, args.prompt_variants)
+            for max_tokens, context_tokens, variant in grid:
+                model = build_model(args.backend, model_name, max_tokens, args.temperature, args)
+                runs = []
+                for scenario, question, expected in queries:
+                    messages = build_messages(scenario, question, variant, context_tokens)
+                    for _ in range(args.repeats):
+                        run = timed_stream(model, messages)
+                        run["quality"] = quality_score(run["answer"], expected, run["tokens"], max_tokens)
+                        runs.append(run)
+                        results_file.write(json.dumps({
+                            "model": model_name, "max_tokens": max_tokens, "context_tokens": context_tokens,
+                            "prompt_variant": variant, "scenario": scenario, "question": question, **run,
+                        }, ensure_ascii=False) + "\n")
+                        peak_rss = max(peak_rss, current_rss_mb())
+                results_file.flush()
+
+                if args.backend == "local":
+                    memory_mb = peak_rss - baseline_rss
+                else:
+                    memory_mb = ollama_model_mb(args.ollama_url, model_name)
+
+                row = {
+                    "model": model_name,
+                    "max_tokens": max_tokens,
+                    "context_tokens": context_tokens,
+                    "prompt_variant": variant,
+                    "ttft_p50": statistics.median(r["ttft"] for r in runs),
+                    "latency_p50": statistics.median(r["latency"] for r in runs),
+                    "latency_max": max(r["latency"] for r in runs),
+                    "tokens_per_sec": statistics.median(r["tokens_per_sec"] for r in runs),
+                    "memory_mb": memory_mb,
+                    "quality": statistics.mean(r["quality"] for r in runs),
+                }
+                rows.append(row)
+                print(
+                    f"{model_name} max_tokens={max_tokens} context={context_tokens} prompt={variant}: "
+                    f"latency p50 {row['latency_p50']:.2f}s, ttft {row['ttft_p50']:.2f}s, "
+                    f"{row['tokens_per_sec']:.1f} tok/s, quality {row['quality']:.2f}"
+                )
+
+    front = pareto_front(rows)
+    for row in rows:
+        row["pareto"] = row in front
+
+    with open(os.path.join(args.output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    report_path = os.path.join(args.output_dir, "report.md")
+    write_report(report_path, rows, front, args)
+    print(f"\n{len(front)} Pareto-optimal of {len(rows)} settings; report at {report_path}")
+
+
+if __name__ == "__main__":
+    main()
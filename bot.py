@@ -1,31 +1,143 @@
+import logging
 import os
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_sdk.webhook import WebhookClient
+from langchain_community.chat_models import ChatOllama
 from dotenv import load_dotenv
+import admission
 from agent import SlackAIAgent
+from agent_queue import agent_queue
+from cache_warmer import CacheWarmer
+from campaign_metrics import summarize_slack_files
+from context_compaction import ThreadContextCompactor, count_tokens, warm_tokenizer
+from http_server import SlackEventsApp, serve
+from log_pipeline import RequestTrace, setup_logging
+from metrics import metrics, start_metrics_reporter
+from query_log import QueryLog
+from response_store import ResponseStore
+from tenancy import TenantQuota, create_oauth_settings, is_multi_workspace
+from utils import format_error_message, split_slack_message
+import config
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Slack app
-app = App(
-    token=os.environ.get("SLACK_BOT_TOKEN"),
-    signing_secret=os.environ.get("SLACK_SIGNING_SECRET")
-)
+logger = logging.getLogger(__name__)
+
+# In HTTP mode the ASGI server verifies signatures and acks before handing
+# requests to Bolt, so Bolt runs listeners inline and skips re-verifying
+# (an event may wait in the agent queue longer than the replay window)
+http_mode = config.SLACK_MODE == "http" or is_multi_workspace()
+bolt_options = {
+    "signing_secret": os.environ.get("SLACK_SIGNING_SECRET"),
+    # Listener threads mostly wait on the agent queue, where admission
+    # control counts them; keep enough that the backlog doesn't hide in Bolt
+    "listener_executor": ThreadPoolExecutor(
+        max_workers=config.SLACK_LISTENER_THREADS,
+        thread_name_prefix="bolt-listener"
+    ),
+    "process_before_response": http_mode,
+    "request_verification_enabled": not http_mode,
+}
+
+# Initialize Slack app: one bot token, or OAuth installs for many workspaces
+if is_multi_workspace():
+    app = App(oauth_settings=create_oauth_settings(), **bolt_options)
+else:
+    app = App(token=os.environ.get("SLACK_BOT_TOKEN"), **bolt_options)
 
 # Initialize AI agent
-ai_agent = SlackAIAgent(
-    model_name="llama3:8b",
-    temperature=0.7
+if config.AI_BACKEND == "local":
+    # Runs the Hugging Face model in-process on CPU with continuous batching
+    ai_agent = SlackAIAgent(
+        model_name=config.LOCAL_MODEL_NAME,
+        temperature=config.AI_TEMPERATURE,
+        backend="local",
+        max_tokens=config.AI_MAX_TOKENS
+    )
+else:
+    ai_agent = SlackAIAgent(
+        model_name=config.OLLAMA_MODEL_NAME,
+        temperature=config.AI_TEMPERATURE,
+        max_tokens=config.AI_MAX_TOKENS
+    )
+
+# Load-aware admission in front of the model backend
+admission_controller = admission.AdmissionController(agent_queue)
+
+# Small, fast model used for degraded answers under overload. The local
+# backend reuses the loaded weights with a short cap instead of loading
+# a second model.
+if config.AI_BACKEND == "local":
+    from local_backend import LocalChatModel
+    degraded_llm = LocalChatModel(
+        model_name=config.LOCAL_MODEL_NAME,
+        temperature=0.3,
+        max_new_tokens=config.DEGRADED_MAX_TOKENS
+    )
+else:
+    degraded_llm = ChatOllama(
+        model=config.DEGRADED_MODEL_NAME,
+        temperature=0.3,
+        num_predict=config.DEGRADED_MAX_TOKENS
+    )
+
+# Degraded answers get their own breaker and a small concurrency cap so
+# they can't pile extra load onto a backend that is already struggling
+degraded_breaker = admission.CircuitBreaker()
+degraded_slots = threading.BoundedSemaphore(config.DEGRADED_MAX_CONCURRENCY)
+
+DEGRADED_NOTICE = "\n\n_⚠️ I'm under heavy load right now, so this is a {kind} answer. Ask again later for a full one._"
+
+
+def summarize_thread(prompt: str) -> str:
+    """Generate a thread summary, deferring it while the bot is busy"""
+    if admission_controller.decide(admission.LOW) != admission.ADMIT:
+        raise admission.OverloadedError("Thread summary deferred under load")
+    return admission_controller.call(ai_agent.llm.invoke, prompt).content
+
+
+# Rolling thread summaries are generated with the same model
+context_compactor = ThreadContextCompactor(summarize=summarize_thread)
+
+# Query analytics and pre-generated answers for frequent questions
+query_log = QueryLog()
+response_store = ResponseStore()
+cache_warmer = CacheWarmer(
+    generate=lambda question: admission_controller.call(ai_agent.run, message=question),
+    query_log=query_log,
+    store=response_store,
+    should_run=lambda: admission_controller.decide(admission.LOW) == admission.ADMIT
 )
 
-# ai_agent = SlackAIAgent(
-#     model_name="meta-llama/Llama-2-7b-chat-hf",
-#     temperature=0.7
-# )
+# Slack lookups for a request run concurrently on this pool
+slack_io_pool = ThreadPoolExecutor(
+    max_workers=config.SLACK_IO_WORKERS,
+    thread_name_prefix="slack-io"
+)
+
+# CSV downloads and aggregation are slow and memory-heavy; a separate small
+# pool keeps large uploads from starving the Slack lookups of other requests
+campaign_metrics_pool = ThreadPoolExecutor(
+    max_workers=config.CAMPAIGN_METRICS_WORKERS,
+    thread_name_prefix="campaign-metrics"
+)
 
-# Store bot user ID
+# Workspaces share the agent and model pool, each within its own quota.
+# Buckets are per process, so each replica enforces its share of the quota.
+replicas = max(1, int(os.environ.get("REPLICAS", config.HTTP_REPLICAS)))
+tenant_quota = TenantQuota(
+    per_minute=config.TENANT_REQUESTS_PER_MINUTE / replicas,
+    burst=max(1, config.TENANT_BURST // replicas)
+)
+
+# Fallback bot user ID; Bolt resolves the per-workspace ID into the context
 BOT_USER_ID = os.environ.get("BOT_USER_ID")
 
 
@@ -35,7 +147,7 @@ def get_user_info(client, user_id: str) -> dict:
         result = client.users_info(user=user_id)
         return result["user"]
     except Exception as e:
-        print(f"Error fetching user info: {e}")
+        logger.warning("Error fetching user info: %s", e, extra={"user": user_id})
         return {}
 
 
@@ -45,10 +157,206 @@ def get_channel_info(client, channel_id: str) -> dict:
         result = client.conversations_info(channel=channel_id)
         return result["channel"]
     except Exception as e:
-        print(f"Error fetching channel info: {e}")
+        logger.warning("Error fetching channel info: %s", e, extra={"channel": channel_id})
         return {}
 
 
+def fetch_thread_messages(client, channel_id: str, thread_ts: str, oldest: str = None) -> list:
+    """
+    Fetch a thread oldest first, paging to the end so the newest turns are included
+
+    Args:
+        client: Slack web client
+        channel_id: Channel containing the thread
+        thread_ts: Timestamp of the thread's parent message
+        oldest: Only fetch messages after this ts (None for the whole thread)
+
+    Returns:
+        Up to CONTEXT_HISTORY_LIMIT of the newest messages
+    """
+    # conversations.replies pages from the parent forward; keep only the tail
+    messages = deque(maxlen=config.CONTEXT_HISTORY_LIMIT)
+    cursor = None
+    while True:
+        result = client.conversations_replies(
+            channel=channel_id,
+            ts=thread_ts,
+            oldest=oldest,
+            limit=config.CONTEXT_HISTORY_PAGE_SIZE,
+            cursor=cursor
+        )
+        messages.extend(result["messages"])
+        cursor = (result.get("response_metadata") or {}).get("next_cursor")
+        if not result.get("has_more") or not cursor:
+            return list(messages)
+
+
+def get_thread_context(client, channel_id: str, thread_ts: str, current_ts: str) -> str:
+    """Fetch thread history and compact it into a token-bounded context"""
+    thread_key = f"{channel_id}:{thread_ts}"
+    try:
+        # Turns already folded into the rolling summary needn't be fetched again
+        oldest = context_compactor.summarized_through(thread_key)
+        history = [
+            msg for msg in fetch_thread_messages(client, channel_id, thread_ts, oldest)
+            if msg.get("ts") != current_ts and msg.get("text") != "Thinking... 🤔"
+        ]
+        return context_compactor.build_context(thread_key, history)
+    except Exception as e:
+        logger.warning("Error fetching thread context: %s", e, extra={"channel": channel_id})
+        return ""
+
+
+def run_stage(trace: RequestTrace, name: str, fn, *args, pool: ThreadPoolExecutor = None, **kwargs):
+    """Run a pipeline step on a worker pool (Slack I/O by default), timing it in the trace"""
+    def timed():
+        with trace.stage(name):
+            return fn(*args, **kwargs)
+    return (pool or slack_io_pool).submit(timed)
+
+
+def wait_for_placeholder(placeholder, trace: RequestTrace):
+    """
+    Wait for the "Thinking..." post before replying, so the two stay in order
+
+    A failed placeholder post is logged rather than raised; by now the
+    answer is already generated and should still be sent.
+    """
+    try:
+        placeholder.result()
+    except Exception as e:
+        logger.warning("Error posting placeholder: %s", e, extra={"request_id": trace.request_id})
+
+
+def record_pre_generation(trace: RequestTrace, stage_names: list):
+    """
+    Record how long the request waited before generation started
+
+    Args:
+        trace: The request's trace
+        stage_names: Steps that ran one after another before they were
+            made concurrent; ones that haven't finished yet (typically the
+            placeholder post) count as zero, so savings are a lower bound
+    """
+    wall = trace.elapsed()
+    serial = sum(trace.stages.get(name, 0.0) for name in stage_names)
+    trace.add_stage("pre_generation", wall)
+    # What the same steps would have cost run one after another
+    trace.fields["pre_generation_serial"] = round(serial, 4)
+    metrics.observe("pre_generation_seconds", wall, kind=trace.kind)
+    metrics.observe("pre_generation_saved_seconds", max(0.0, serial - wall), kind=trace.kind)
+
+
+def degraded_answer(question: str) -> str:
+    """Answer cheaply under overload: a cached nearby answer, else the small model"""
+    nearest = response_store.nearest(question, min_similarity=config.DEGRADED_SIMILARITY)
+    if nearest is not None:
+        metrics.increment("admission.degraded_answers", source="cache")
+        return nearest[0] + DEGRADED_NOTICE.format(kind="saved")
+    
+    if not degraded_slots.acquire(blocking=False):
+        metrics.increment("admission.degraded_answers", source="none")
+        raise admission.OverloadedError("No degraded answer available")
+    try:
+        if not degraded_breaker.allow():
+            raise admission.CircuitOpenError("Degraded model is unavailable")
+        try:
+            response = degraded_llm.invoke(question).content
+        except Exception:
+            degraded_breaker.record_failure()
+            raise
+        degraded_breaker.record_success()
+    except Exception as e:
+        logger.warning("Error generating degraded answer: %s", e)
+        metrics.increment("admission.degraded_answers", source="none")
+        raise admission.OverloadedError("No degraded answer available") from e
+    finally:
+        degraded_slots.release()
+    
+    metrics.increment("admission.degraded_answers", source="short_model")
+    return response + DEGRADED_NOTICE.format(kind="short")
+
+
+def get_campaign_summary(files: list, context) -> str:
+    """Compute exact metrics for CSV uploads so the model only narrates them"""
+    token = context.bot_token or os.environ.get("SLACK_BOT_TOKEN")
+    with metrics.timer("campaign_metrics_seconds"):
+        summary = summarize_slack_files(files, token)
+    if not summary:
+        return ""
+    return (
+        "Computed campaign metrics (exact, from the uploaded data; "
+        "use these numbers instead of recalculating):\n" + summary
+    )
+
+
+def answer_question(
+    question: str,
+    user_info: dict,
+    channel_info: dict,
+    thread_context: str = "",
+    data_context: str = "",
+    trace: RequestTrace = None,
+    priority: str = admission.NORMAL,
+    team_id: str = None
+) -> str:
+    """Answer a question from the response store or the agent, and log it"""
+    start = time.perf_counter()
+    
+    # Pre-generated answers only apply to standalone questions
+    cached = None if thread_context or data_context else response_store.get(question)
+    decision = admission.ADMIT
+    if cached is not None:
+        metrics.increment("response_store.hits")
+        response = cached
+    else:
+        tenant_quota.check(team_id)
+        decision = admission_controller.decide(priority)
+        if decision == admission.SHED:
+            raise admission.OverloadedError("Request shed under load")
+        
+        message = question
+        if thread_context or data_context:
+            preamble = "\n\n".join(part for part in (thread_context, data_context) if part)
+            message = f"{preamble}\n\nCurrent question: {question}"
+        
+        if decision == admission.ADMIT:
+            try:
+                # Generation waits on the agent queue, where admission sees the backlog
+                response = agent_queue.run(
+                    admission_controller.call,
+                    ai_agent.run,
+                    message=message,
+                    user_info=user_info,
+                    channel_info=channel_info,
+                    question=question,
+                    data_context=data_context
+                )
+            except admission.CircuitOpenError:
+                decision = admission.DEGRADE
+        
+        if decision == admission.DEGRADE:
+            response = degraded_answer(question)
+    
+    latency = time.perf_counter() - start
+    metrics.observe("tenant.answer_seconds", latency, team=team_id or "unknown")
+    if trace is not None:
+        trace.add_stage("answer", latency)
+        trace.fields.update(
+            cached=cached is not None,
+            admission=decision,
+            prompt_tokens=count_tokens(question) + count_tokens(thread_context) + count_tokens(data_context),
+            completion_tokens=count_tokens(response)
+        )
+    
+    try:
+        query_log.record(question, response, latency, cached=cached is not None, admission=decision)
+    except OSError as e:
+        logger.warning("Error writing query log: %s", e)
+    
+    return response
+
+
 def extract_message_text(text: str, bot_user_id: str) -> str:
     """Extract the actual message text by removing bot mentions"""
     # Remove bot mention
@@ -58,8 +366,14 @@ def extract_message_text(text: str, bot_user_id: str) -> str:
 
 
 @app.event("app_mention")
-def handle_mention(event, say, client):
+def handle_mention(event, say, client, context):
     """Handle when the bot is mentioned in a channel"""
+    trace = RequestTrace(
+        "app_mention",
+        team=context.team_id,
+        user=event.get("user"),
+        channel=event.get("channel")
+    )
     try:
         # Extract event data
         user_id = event["user"]
@@ -67,81 +381,129 @@ def handle_mention(event, say, client):
         text = event["text"]
         thread_ts = event.get("thread_ts", event["ts"])
         
-        # Show typing indicator
-        client.chat_postMessage(
+        # Show typing indicator and fetch context concurrently
+        placeholder = run_stage(
+            trace, "placeholder", client.chat_postMessage,
             channel=channel_id,
             thread_ts=thread_ts,
             text="Thinking... 🤔"
         )
+        user_future = run_stage(trace, "user_info", get_user_info, client, user_id)
+        channel_future = run_stage(trace, "channel_info", get_channel_info, client, channel_id)
+        
+        # Include earlier thread turns when replying inside a thread
+        thread_future = None
+        if "thread_ts" in event:
+            thread_future = run_stage(
+                trace, "thread_context", get_thread_context,
+                client, channel_id, thread_ts, event["ts"]
+            )
         
-        # Get context
-        user_info = get_user_info(client, user_id)
-        channel_info = get_channel_info(client, channel_id)
+        # Crunch attached campaign CSVs alongside the Slack lookups
+        data_future = None
+        if event.get("files"):
+            data_future = run_stage(
+                trace, "campaign_metrics", get_campaign_summary, event["files"], context,
+                pool=campaign_metrics_pool
+            )
         
         # Extract clean message
-        message = extract_message_text(text, BOT_USER_ID)
+        message = extract_message_text(text, context.bot_user_id or BOT_USER_ID)
+        
+        # Generation only waits for its inputs, not for the placeholder post
+        user_info = user_future.result()
+        channel_info = channel_future.result()
+        thread_context = thread_future.result() if thread_future else ""
+        data_context = data_future.result() if data_future else ""
+        record_pre_generation(trace, ["placeholder", "user_info", "channel_info", "thread_context", "campaign_metrics"])
         
         # Get AI response
-        response = ai_agent.run(
-            message=message,
+        response = answer_question(
+            question=message,
             user_info=user_info,
-            channel_info=channel_info
+            channel_info=channel_info,
+            thread_context=thread_context,
+            data_context=data_context,
+            trace=trace,
+            team_id=context.team_id
         )
         
         # Delete typing indicator
         # Note: In production, you'd want to store and delete the typing message
+        wait_for_placeholder(placeholder, trace)
         
         # Send response in thread
-        say(
-            text=response,
-            thread_ts=thread_ts
-        )
+        with trace.stage("reply"):
+            say(
+                text=response,
+                thread_ts=thread_ts
+            )
+        trace.finish(logger)
         
     except Exception as e:
-        print(f"Error handling mention: {e}")
+        logger.exception("Error handling mention: %s", e, extra={"request_id": trace.request_id})
+        trace.finish(logger, status="error", error=type(e).__name__)
         say(
-            text=f"Sorry, I encountered an error: {str(e)}",
+            text=format_error_message(e),
             thread_ts=event.get("thread_ts", event["ts"])
         )
 
 
 @app.message("")
-def handle_direct_message(message, say, client):
+def handle_direct_message(message, say, client, context):
     """Handle direct messages to the bot"""
+    # Only respond to DMs (not channel messages)
+    if message.get("channel_type") != "im":
+        return
+    
+    # Ignore bot messages
+    if message.get("bot_id"):
+        return
+    
+    trace = RequestTrace("direct_message", team=context.team_id, user=message.get("user"))
     try:
-        # Only respond to DMs (not channel messages)
-        if message.get("channel_type") != "im":
-            return
-        
-        # Ignore bot messages
-        if message.get("bot_id"):
-            return
-            
         user_id = message["user"]
         text = message["text"]
         
-        # Show typing indicator
-        client.chat_postMessage(
+        # Show typing indicator while fetching user context
+        placeholder = run_stage(
+            trace, "placeholder", client.chat_postMessage,
             channel=message["channel"],
             text="Thinking... 🤔"
         )
+        user_future = run_stage(trace, "user_info", get_user_info, client, user_id)
+        data_future = None
+        if message.get("files"):
+            data_future = run_stage(
+                trace, "campaign_metrics", get_campaign_summary, message["files"], context,
+                pool=campaign_metrics_pool
+            )
         
-        # Get user context
-        user_info = get_user_info(client, user_id)
+        user_info = user_future.result()
+        data_context = data_future.result() if data_future else ""
+        record_pre_generation(trace, ["placeholder", "user_info", "campaign_metrics"])
         
         # Get AI response
-        response = ai_agent.run(
-            message=text,
+        response = answer_question(
+            question=text,
             user_info=user_info,
-            channel_info={"name": "direct-message"}
+            channel_info={"name": "direct-message"},
+            data_context=data_context,
+            trace=trace,
+            priority=admission.HIGH,
+            team_id=context.team_id
         )
         
-        # Send response
-        say(response)
+        # Send response after the typing indicator so they stay in order
+        wait_for_placeholder(placeholder, trace)
+        with trace.stage("reply"):
+            say(response)
+        trace.finish(logger)
         
     except Exception as e:
-        print(f"Error handling DM: {e}")
-        say(f"Sorry, I encountered an error: {str(e)}")
+        logger.exception("Error handling DM: %s", e, extra={"request_id": trace.request_id})
+        trace.finish(logger, status="error", error=type(e).__name__)
+        say(format_error_message(e))
 
 
 @app.event("message")
@@ -161,6 +523,7 @@ def handle_help_command(ack, respond):
     *How to use me:*
     • Mention me in any channel: `@AI Marketing Manager your question here`
     • Send me a direct message with your question
+    • Ask privately with `/ai-ask your question` (add `--public` to share the answer)
     • Use the `/ai-help` command to see this help message
     
     *What I can help with:*
@@ -181,17 +544,123 @@ def handle_help_command(ack, respond):
     respond(help_text)
 
 
+def answer_slash_question(
+    question: str,
+    response_url: str,
+    response_type: str,
+    user_info: dict,
+    channel_info: dict,
+    received_at: float,
+    trace: RequestTrace,
+    team_id: str = None
+):
+    """Run the agent for a slash command and deliver the answer via response_url"""
+    webhook = WebhookClient(response_url)
+    queue_seconds = time.perf_counter() - received_at
+    metrics.observe("slash_ask.queue_seconds", queue_seconds)
+    trace.add_stage("queue", queue_seconds)
+    
+    try:
+        with metrics.timer("slash_ask.agent_seconds"):
+            response = answer_question(
+                question=question,
+                user_info=user_info,
+                channel_info=channel_info,
+                trace=trace,
+                priority=admission.HIGH,
+                team_id=team_id
+            )
+        
+        chunks = split_slack_message(
+            response,
+            max_length=config.MAX_RESPONSE_LENGTH,
+            max_parts=config.SLASH_MAX_RESPONSES
+        )
+        with trace.stage("reply"):
+            for index, chunk in enumerate(chunks):
+                webhook.send(
+                    text=chunk,
+                    response_type=response_type,
+                    # The first chunk replaces the "working on it" ack
+                    replace_original=index == 0 and response_type == "ephemeral"
+                )
+        metrics.increment("slash_ask.answered")
+        trace.finish(logger, chunks=len(chunks))
+        
+    except Exception as e:
+        logger.exception("Error answering slash command: %s", e, extra={"request_id": trace.request_id})
+        trace.finish(logger, status="error", error=type(e).__name__)
+        metrics.increment("slash_ask.errors")
+        webhook.send(text=format_error_message(e), response_type="ephemeral")
+    
+    finally:
+        metrics.observe("slash_ask.total_seconds", time.perf_counter() - received_at)
+
+
+@app.command("/ai-ask")
+def handle_ask_command(ack, command, context):
+    """Handle /ai-ask slash command: ack now, answer later via response_url"""
+    received_at = time.perf_counter()
+    team_id = context.team_id or command.get("team_id")
+    trace = RequestTrace(
+        "slash_ask",
+        team=team_id,
+        user=command.get("user_id"),
+        channel=command.get("channel_id")
+    )
+    question = command.get("text", "").strip()
+    
+    response_type = "ephemeral"
+    if question.startswith("--public"):
+        response_type = "in_channel"
+        question = question[len("--public"):].strip()
+    
+    if not question:
+        ack("Usage: `/ai-ask [--public] your marketing question`")
+        return
+    
+    ack(f"Working on it... 🤔\n>{question}")
+    trace.add_stage("ack", time.perf_counter() - received_at)
+    metrics.observe("slash_ask.ack_seconds", time.perf_counter() - received_at)
+    metrics.increment("slash_ask.received")
+    
+    # Slack lookups and the model call happen on the agent queue
+    agent_queue.submit(
+        answer_slash_question,
+        question=question,
+        response_url=command["response_url"],
+        response_type=response_type,
+        user_info={"real_name": command.get("user_name", "User")},
+        channel_info={"name": command.get("channel_name", "channel")},
+        received_at=received_at,
+        trace=trace,
+        team_id=team_id
+    )
+
+
 def main():
     """Start the Slack bot"""
+    # Replicas on one host each need their own rotating log file
+    log_writer = setup_logging(path=os.environ.get("LOG_PATH", config.LOG_PATH))
     try:
         # Validate environment variables
-        required_vars = [
-            "SLACK_BOT_TOKEN",
-            "SLACK_APP_TOKEN",
-            "SLACK_SIGNING_SECRET",
-            "BOT_USER_ID"
-        ]
-
+        if is_multi_workspace():
+            required_vars = [
+                "SLACK_CLIENT_ID",
+                "SLACK_CLIENT_SECRET",
+                "SLACK_SIGNING_SECRET"
+            ]
+        elif http_mode:
+            required_vars = [
+                "SLACK_BOT_TOKEN",
+                "SLACK_SIGNING_SECRET"
+            ]
+        else:
+            required_vars = [
+                "SLACK_BOT_TOKEN",
+                "SLACK_APP_TOKEN",
+                "SLACK_SIGNING_SECRET"
+            ]
         
         missing_vars = [var for var in required_vars if not os.environ.get(var)]
         
@@ -201,14 +670,42 @@ def main():
             return
         
         print("🚀 Starting AI Marketing Manager Bot...")
-        print(f"Bot User ID: {BOT_USER_ID}")
+
+        # Load the context tokenizer now rather than on the first thread reply
+        if not warm_tokenizer():
+            logger.warning("Tokenizer %s unavailable; thread context token counts are approximate", config.CONTEXT_TOKENIZER)
         
-        # Start the bot using Socket Mode
-        handler = SocketModeHandler(app, os.environ["SLACK_APP_TOKEN"])
-        handler.start()
+        # Pre-generate answers for hot questions during off-peak hours
+        cache_warmer.start()
+        start_metrics_reporter(config.METRICS_REPORT_INTERVAL)
+        
+        if http_mode:
+            # Events (and OAuth installs for all workspaces) arrive over HTTP;
+            # PORT lets several replicas run side by side behind the proxy
+            port = int(os.environ.get("PORT", config.HTTP_PORT))
+            if is_multi_workspace():
+                print(f"Multi-workspace mode: install at /slack/install on port {port}")
+            print(f"HTTP mode: Slack events at {config.SLACK_EVENTS_PATH} on port {port}")
+            events_app = SlackEventsApp(
+                app,
+                os.environ["SLACK_SIGNING_SECRET"],
+                on_shutdown=agent_queue.shutdown
+            )
+            serve(events_app, port=port)
+        else:
+            # Start the bot using Socket Mode
+            handler = SocketModeHandler(
+                app,
+                os.environ["SLACK_APP_TOKEN"],
+                concurrency=config.SLACK_LISTENER_THREADS
+            )
+            handler.start()
         
     except Exception as e:
-        print(f"Error starting bot: {e}")
+        logger.exception("Error starting bot: %s", e)
+    
+    finally:
+        log_writer.stop()
 
 
 if __name__ == "__main__":
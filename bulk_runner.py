@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Offline bulk query runner
+
+Reads queries from a JSONL file, runs them through either agent with
+bounded concurrency and an optional rate limit, and appends results to an
+output JSONL file. Results are fsynced in micro-batches, and items already
+present in the output are skipped, so a crashed run resumes where it
+stopped.
+
+Input lines look like:
+    {"id": "q1", "query": "Write 3 subject lines for our spring sale"}
+
+"message" is accepted instead of "query"; "id" defaults to the line number,
+and "user_info", "channel_info" and "context" are passed to the agent.
+
+Usage:
+    python bulk_runner.py queries.jsonl results.jsonl --agent enhanced --concurrency 8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+
+
+class RateLimiter:
+    """Spaces out calls to at most `rate` per second (0 disables)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def load_items(path: str) -> list:
+    """Read query items from a JSONL file"""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            item.setdefault("id", str(line_number))
+            item["id"] = str(item["id"])
+            item["query"] = item.get("query") or item.get("message") or ""
+            items.append(item)
+    return items
+
+
+def load_completed(path: str, retry_errors: bool) -> set:
+    """IDs already in the output file (the checkpoint)"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line from a crash
+            if retry_errors and record.get("error"):
+                continue
+            completed.add(str(record["id"]))
+    return completed
+
+
+def create_agent(args):
+    """Build the requested agent"""
+    if args.agent == "enhanced":
+        from enhanced_agent import EnhancedMarketingAgent
+        return EnhancedMarketingAgent(model_name=args.model or config.AI_MODEL_NAME, temperature=args.temperature)
+
+    from agent import SlackAIAgent
+    default_model = config.LOCAL_MODEL_NAME if args.backend == "local" else config.OLLAMA_MODEL_NAME
+    return SlackAIAgent(model_name=args.model or default_model, temperature=args.temperature, backend=args.backend)
+
+
+def invoke_agent(agent, item: dict, is_enhanced: bool) -> str:
+    """
+    Run the agent's graph directly
+
+    The agents' run() methods turn failures into apology text (the enhanced
+    agent even catches every exception), which would be checkpointed as a
+    successful answer; here failures raise instead.
+    """
+    state = {
+        "messages": [HumanMessage(content=item["query"])],
+        "user_info": item.get("user_info") or {},
+        "channel_info": item.get("channel_info") or {},
+    }
+    if is_enhanced:
+        state["query_type"] = "general"
+        state["context"] = item.get("context") or {}
+
+    result = agent.graph.invoke(state)
+    ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+    if not ai_messages:
+        raise RuntimeError("Agent produced no response")
+    return ai_messages[-1].content
+
+
+def run_item(agent, item: dict, is_enhanced: bool, limiter: RateLimiter) -> dict:
+    """Run one query and time it"""
+    limiter.wait()
+    start = time.perf_counter()
+    record = {"id": item["id"], "query": item["query"]}
+    try:
+        record["response"] = invoke_agent(agent, item, is_enhanced)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["latency"] = round(time.perf_counter() - start, 4)
+    record["ts"] = time.time()
+    return record
+
+
+def repair_output(path: str):
+    """Terminate a torn last line so appended records start on a fresh line"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def write_batch(out, records: list):
+    """Append records and make them durable before counting them done"""
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--agent", choices=["basic", "enhanced"], default="basic")
+    parser.add_argument("--backend", choices=["ollama", "local"], default=config.AI_BACKEND,
+                        help="Model backend for the basic agent")
+    parser.add_argument("--model", help="Model name (defaults from config.py)")
+    parser.add_argument("--temperature", type=float, default=config.AI_TEMPERATURE)
+    parser.add_argument("--concurrency", type=int, default=4, help="Queries in flight at once")
+    parser.add_argument("--batch-size", type=int, default=16,
+                        help="Results written and fsynced per checkpoint")
+    parser.add_argument("--rate", type=float, default=0, help="Max queries started per second (0 = unlimited)")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-run items that failed previously (the newest record per id wins)")
+    parser.add_argument("--limit", type=int, help="Process at most this many pending items")
+    args = parser.parse_args()
+
+    items = load_items(args.input)
+    completed = load_completed(args.output, args.retry_errors)
+    pending = [item for item in items if item["id"] not in completed]
+    already_done = len(items) - len(pending)
+    if args.limit:
+        pending = pending[:args.limit]
+
+    print(f"{len(items)} queries, {already_done} already done, {len(pending)} to run", file=sys.stderr)
+    if not pending:
+        return 0
+
+    repair_output(args.output)
+    agent = create_agent(args)
+    is_enhanced = args.agent == "enhanced"
+    limiter = RateLimiter(args.rate)
+
+    latencies, errors, done = [], 0, 0
+    start = time.perf_counter()
+    remaining = iter(pending)
+    buffer = []
+
+    with open(args.output, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        in_flight = set()
+        try:
+            while True:
+                # Keep `concurrency` items in flight; don't read ahead further
+                while len(in_flight) < args.concurrency:
+                    item = next(remaining, None)
+                    if item is None:
+                        break
+                    in_flight.add(pool.submit(run_item, agent, item, is_enhanced, limiter))
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    buffer.append(record)
+                    done += 1
+                    if record.get("error"):
+                        errors += 1
+                    else:
+                        latencies.append(record["latency"])
+
+                if len(buffer) >= args.batch_size:
+                    write_batch(out, buffer)
+                    buffer = []
+                    elapsed = time.perf_counter() - start
+                    print(f"{done}/{len(pending)} done, {errors} errors, {done / elapsed:.2f} q/s", file=sys.stderr)
+        finally:
+            # Whatever finished is kept even if we are interrupted
+            if buffer:
+                write_batch(out, buffer)
+
+    wall = time.perf_counter() - start
+    summary = {
+        "processed": done,
+        "errors": errors,
+        "wall_seconds": round(wall, 2),
+        "throughput_qps": round(done / wall, 3) if wall else 0.0,
+    }
+    if latencies:
+        summary.update(
+            latency_avg=round(statistics.mean(latencies), 3),
+            latency_p50=round(percentile(latencies, 0.5), 3),
+            latency_p95=round(percentile(latencies, 0.95), 3),
+            latency_p99=round(percentile(latencies, 0.99), 3),
+        )
+    print(json.dumps(summary, indent=2))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
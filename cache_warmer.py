@@ -0,0 +1,174 @@
+"""
+Proactive cache warming for frequently asked questions
+
+Clusters the questions in the query log and, during off-peak hours,
+pre-generates answers for the most frequent ones into the response store
+so the next asker gets a cached answer instead of a full generation.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterable, List
+
+import config
+from query_log import QueryLog
+from response_store import ResponseStore, query_similarity
+
+logger = logging.getLogger(__name__)
+
+
+def cluster_frequent_queries(
+    records: Iterable[dict],
+    min_count: int = config.CACHE_WARM_MIN_COUNT,
+    similarity: float = config.CACHE_SIMILARITY,
+    top_n: int = config.CACHE_WARM_TOP_N
+) -> List[dict]:
+    """
+    Group similar questions from the query log
+
+    Args:
+        records: Query log records
+        min_count: Minimum number of asks for a cluster to be returned
+        similarity: Word-overlap needed to join an existing cluster
+        top_n: Maximum number of clusters returned
+
+    Returns:
+        Clusters sorted by frequency, each with its representative
+        normalized query, the most frequent original phrasing of it
+        ("question"), every normalized phrasing in the cluster
+        ("queries"), query_type and count
+    """
+    counts = Counter()
+    query_types = {}
+    phrasings = {}
+    for record in records:
+        query = record.get("query")
+        if query:
+            counts[query] += 1
+            query_types[query] = record.get("query_type", "general")
+            # Older records only have the normalized text
+            phrasings.setdefault(query, Counter())[record.get("question") or query] += 1
+
+    clusters = []
+    # Most frequent phrasings first, so they become the representatives
+    for query, count in counts.most_common():
+        for cluster in clusters:
+            if query_similarity(query, cluster["query"]) >= similarity:
+                cluster["count"] += count
+                cluster["queries"].append(query)
+                break
+        else:
+            clusters.append({
+                "query": query,
+                "question": phrasings[query].most_common(1)[0][0],
+                "queries": [query],
+                "query_type": query_types[query],
+                "count": count,
+            })
+
+    clusters = [c for c in clusters if c["count"] >= min_count]
+    clusters.sort(key=lambda c: c["count"], reverse=True)
+    return clusters[:top_n]
+
+
+class CacheWarmer:
+    """Background job that keeps answers for hot questions fresh"""
+
+    def __init__(
+        self,
+        generate: Callable[[str], str],
+        query_log: QueryLog,
+        store: ResponseStore,
+        off_peak_hours: Iterable[int] = config.CACHE_WARM_HOURS,
+        interval: float = config.CACHE_WARM_INTERVAL,
+        should_run: Callable[[], bool] = lambda: True,
+        lock_path: str = config.CACHE_WARM_LOCK_PATH
+    ):
+        """
+        Args:
+            generate: Callable that answers a question
+            query_log: Log used to find frequent questions
+            store: Store that receives the generated answers
+            off_peak_hours: Local hours in which warming may run
+            interval: Seconds between checks
+            should_run: Checked before each generation; warming is deferred
+                to the next check when it returns False
+            lock_path: File lock shared by replicas so only one warms at a time
+        """
+        self.generate = generate
+        self.query_log = query_log
+        self.store = store
+        self.off_peak_hours = set(off_peak_hours)
+        self.interval = interval
+        self.should_run = should_run
+        self.lock_path = lock_path
+        self._stop = threading.Event()
+        self._thread = None
+
+    def warm(self) -> int:
+        """
+        Pre-generate answers for frequent questions that are missing or stale
+
+        Skipped when another replica holds the warm lock.
+
+        Returns:
+            Number of answers generated
+        """
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            return self._warm_locked()
+
+    def _warm_locked(self) -> int:
+        # Start from what other replicas already generated
+        self.store.reload()
+        since = time.time() - config.CACHE_WARM_LOOKBACK_DAYS * 86400
+        clusters = cluster_frequent_queries(self.query_log.iter_records(since=since))
+
+        generated = aliased = 0
+        for cluster in clusters:
+            if self._stop.is_set() or not self.should_run():
+                break
+            # Cache hits are exact-key only, so every phrasing seen in the
+            # cluster gets the answer under its own key
+            if not self.store.needs_refresh(cluster["query"]):
+                aliased += self.store.add_aliases(cluster["query"], cluster["queries"])
+                continue
+            try:
+                # The model gets a real phrasing, not the normalized key
+                answer = self.generate(cluster["question"])
+                self.store.put(cluster["query"], answer, cluster["query_type"], aliases=cluster["queries"])
+                generated += 1
+            except Exception as e:
+                logger.warning("Error warming cache for %r: %s", cluster["query"], e)
+
+        if generated or aliased:
+            self.store.save()
+        return generated
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # Serve answers warmed by whichever replica holds the lock
+            self.store.reload()
+            if datetime.now().hour in self.off_peak_hours:
+                self.warm()
+
+    def start(self):
+        """Start checking for warm-up work in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background job"""
+        self._stop.set()
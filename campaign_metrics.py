@@ -0,0 +1,272 @@
+"""
+Campaign metrics engine for uploaded CSV exports
+
+Campaign exports are streamed in chunks and aggregated with vectorized
+pandas group-bys, so CAC, LTV, ROAS, CTR and conversion rate are computed
+exactly instead of by the model. The result is rendered as a compact
+text summary that the agent only has to narrate.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+# Header spellings seen in ad platform exports, mapped to canonical names
+COLUMN_ALIASES = {
+    "campaign": ["campaign", "campaign_name", "campaign_id"],
+    "channel": ["channel", "source", "platform", "network", "medium"],
+    "date": ["date", "day", "reporting_starts", "report_date"],
+    "spend": ["spend", "cost", "amount_spent", "amount_spent_usd", "ad_spend"],
+    "impressions": ["impressions", "impr", "views"],
+    "clicks": ["clicks", "link_clicks", "link_clicks_all"],
+    "conversions": ["conversions", "purchases", "results", "orders"],
+    "revenue": ["revenue", "conversion_value", "purchase_value", "purchases_conversion_value", "sales"],
+    "customers": ["new_customers", "customers", "new_customers_acquired"],
+}
+
+DIMENSIONS = ["campaign", "channel", "date"]
+MEASURES = ["spend", "impressions", "clicks", "conversions", "revenue", "customers"]
+
+_ALIAS_LOOKUP = {alias: name for name, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def _normalize_header(header: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(header).strip().lower()).strip("_")
+
+
+def _to_number(series: pd.Series) -> pd.Series:
+    """Parse numbers written like "$1,234.50" or "3.2%" """
+    if series.dtype.kind in "if":
+        return series.astype("float64")
+    cleaned = series.astype(str).str.replace(r"[$€£,%\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def derive_metrics(totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add ratio metrics to aggregated measures
+
+    Args:
+        totals: Frame of summed measures (one row per group)
+
+    Returns:
+        Frame with CAC, LTV, ROAS, CTR and conversion rate columns added
+    """
+    def ratio(numerator: str, denominator: str) -> pd.Series:
+        if numerator not in totals or denominator not in totals:
+            return pd.Series(np.nan, index=totals.index)
+        return totals[numerator] / totals[denominator].replace(0, np.nan)
+
+    # Without a customer count, each conversion is treated as a new customer
+    acquired = "customers" if "customers" in totals else "conversions"
+
+    result = totals.copy()
+    result["cac"] = ratio("spend", acquired)
+    result["ltv"] = ratio("revenue", acquired)
+    result["roas"] = ratio("revenue", "spend")
+    result["ctr"] = ratio("clicks", "impressions")
+    result["conversion_rate"] = ratio("conversions", "clicks")
+    return result
+
+
+def compute_campaign_metrics(source, chunksize: int = config.CAMPAIGN_CSV_CHUNKSIZE) -> Dict[str, pd.DataFrame]:
+    """
+    Aggregate a campaign CSV by campaign, channel and date
+
+    Args:
+        source: Path or file-like object with CSV data
+        chunksize: Rows read per chunk
+
+    Returns:
+        Dictionary with a "total" frame plus one frame per dimension present
+        in the data, each with summed measures and derived metrics
+
+    Raises:
+        ValueError: If the file has none of the recognised measure columns
+    """
+    header = pd.read_csv(source, nrows=0)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    rename = {}
+    for column in header.columns:
+        name = _ALIAS_LOOKUP.get(_normalize_header(column))
+        if name and name not in rename.values():
+            rename[column] = name
+
+    measures = [m for m in MEASURES if m in rename.values()]
+    dimensions = [d for d in DIMENSIONS if d in rename.values()]
+    if not measures:
+        raise ValueError("No spend, click, conversion or revenue columns found in the CSV")
+
+    partials = {dimension: [] for dimension in dimensions}
+    totals = pd.Series(0.0, index=measures)
+    rows = 0
+
+    # Let pandas parse plain numbers natively; only dimensions are forced to text
+    dtypes = {column: str for column, name in rename.items() if name in DIMENSIONS}
+    reader = pd.read_csv(source, usecols=list(rename), chunksize=chunksize, dtype=dtypes)
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        for measure in measures:
+            chunk[measure] = _to_number(chunk[measure]).fillna(0.0)
+        if "date" in dimensions:
+            chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+
+        rows += len(chunk)
+        totals += chunk[measures].sum()
+        for dimension in dimensions:
+            partials[dimension].append(chunk.groupby(dimension, sort=False)[measures].sum())
+
+    result = {
+        "total": derive_metrics(totals.to_frame().T.assign(rows=rows)),
+    }
+    for dimension, frames in partials.items():
+        if frames:
+            combined = pd.concat(frames).groupby(level=0).sum()
+            result[dimension] = derive_metrics(combined)
+    return result
+
+
+def _format_row(label: str, row: pd.Series) -> str:
+    parts = []
+    if "spend" in row:
+        parts.append(f"spend {row['spend']:,.2f}")
+    if "revenue" in row:
+        parts.append(f"revenue {row['revenue']:,.2f}")
+    if "conversions" in row:
+        parts.append(f"conv {row['conversions']:,.0f}")
+    formats = {
+        "roas": "ROAS {:.2f}x",
+        "cac": "CAC {:,.2f}",
+        "ltv": "LTV {:,.2f}",
+        "ctr": "CTR {:.2%}",
+        "conversion_rate": "CVR {:.2%}",
+    }
+    for metric, fmt in formats.items():
+        value = row.get(metric)
+        if value is not None and pd.notna(value):
+            parts.append(fmt.format(value))
+    return f"- {label}: " + ", ".join(parts)
+
+
+def summarize_metrics(result: Dict[str, pd.DataFrame], top_n: int = config.CAMPAIGN_SUMMARY_TOP_N) -> str:
+    """
+    Render computed metrics as a compact text summary for the prompt
+
+    Args:
+        result: Output of compute_campaign_metrics
+        top_n: Rows shown per dimension
+
+    Returns:
+        Multi-line summary string
+    """
+    total = result["total"].iloc[0]
+    lines = [
+        f"Campaign data ({int(total['rows']):,} rows). LTV is revenue per acquired customer.",
+        _format_row("Overall", total),
+    ]
+
+    for dimension in ("campaign", "channel"):
+        frame = result.get(dimension)
+        if frame is None:
+            continue
+        order = "spend" if "spend" in frame else frame.columns[0]
+        top = frame.sort_values(order, ascending=False).head(top_n)
+        lines.append(f"Top {len(top)} of {len(frame)} by {dimension} ({order}):")
+        lines.extend(_format_row(str(label), row) for label, row in top.iterrows())
+
+    frame = result.get("date")
+    if frame is not None and len(frame):
+        recent = frame.sort_index().tail(top_n)
+        lines.append(f"Dates {frame.index.min()} to {frame.index.max()}, most recent {len(recent)}:")
+        lines.extend(_format_row(str(label), row) for label, row in recent.iterrows())
+
+    return "\n".join(lines)
+
+
+def download_slack_file(url: str, token: str, max_bytes: int = config.CAMPAIGN_MAX_FILE_BYTES) -> str:
+    """
+    Stream a private Slack file to a temporary file
+
+    Args:
+        url: The file's url_private_download
+        token: Bot token with files:read
+        max_bytes: Abort downloads larger than this
+
+    Returns:
+        Path of the temporary file (caller deletes it)
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f, httpx.stream(
+            "GET", url, headers={"Authorization": f"Bearer {token}"}, follow_redirects=True, timeout=60
+        ) as response:
+            response.raise_for_status()
+            for block in response.iter_bytes(chunk_size=1 << 20):
+                size += len(block)
+                if size > max_bytes:
+                    raise ValueError(f"File is larger than {max_bytes // (1 << 20)} MB")
+                f.write(block)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def summarize_slack_files(files: List[dict], token: str) -> Optional[str]:
+    """
+    Compute a metrics summary for the CSV files attached to a message
+
+    Args:
+        files: The "files" list from a Slack event
+        token: Bot token used to download them
+
+    Returns:
+        Summary text, or None if no CSV could be processed
+    """
+    summaries = []
+    for file in files:
+        if file.get("filetype") != "csv" and not file.get("name", "").lower().endswith(".csv"):
+            continue
+        url = file.get("url_private_download") or file.get("url_private")
+        if not url:
+            continue
+
+        path = None
+        try:
+            path = download_slack_file(url, token)
+            summary = summarize_metrics(compute_campaign_metrics(path))
+            summaries.append(f"File {file.get('name', 'upload.csv')}:\n{summary}")
+        except Exception as e:
+            logger.warning("Error computing campaign metrics for %s: %s", file.get("name"), e)
+        finally:
+            if path:
+                os.unlink(path)
+
+    return "\n\n".join(summaries) or None
+
+
+def campaign_metrics_retriever(state: dict) -> dict:
+    """
+    Context retriever for EnhancedMarketingAgent
+
+    Computes metrics for CSV paths passed as context["campaign_files"].
+    """
+    paths = state.get("context", {}).get("campaign_files") or []
+    summaries = []
+    for path in paths:
+        summaries.append(summarize_metrics(compute_campaign_metrics(path)))
+    return {"campaign_metrics": "\n\n".join(summaries)} if summaries else {}
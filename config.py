@@ -5,7 +5,7 @@ Configuration settings for the Slack AI Bot
 # AI Model Configuration
 AI_MODEL_NAME = "gpt-4-turbo-preview"
 AI_TEMPERATURE = 0.7
-AI_MAX_TOKENS = 1000
+AI_MAX_TOKENS = 1000  # Response token cap; pick it and the model with benchmarks/sweep.py
 
 # Bot Behavior Configuration
 ENABLE_THREADING = True  # Always reply in threads for mentions
@@ -49,3 +49,108 @@ SYSTEM_PROMPTS = {
     
     "default": """You are a helpful AI Marketing Manager assistant."""
 }
+
+# Thread Context Configuration
+CONTEXT_TOKEN_BUDGET = 1500  # Max tokens of thread history added to a prompt
+CONTEXT_RECENT_TOKENS = 1000  # Portion of the budget kept as verbatim recent turns
+CONTEXT_SUMMARY_TOKENS = 400  # Max tokens for the rolling summary of older turns
+CONTEXT_MAX_THREADS = 500  # Thread summaries kept in memory (LRU)
+CONTEXT_HISTORY_LIMIT = 1000  # Newest thread messages kept for context (older ones are dropped)
+CONTEXT_HISTORY_PAGE_SIZE = 200  # Thread messages fetched per conversations.replies call
+CONTEXT_TOKENIZER = "gpt2"  # Hugging Face tokenizer used for token counting
+
+# Execution Queue Configuration
+AGENT_WORKERS = 4  # Concurrent agent runs
+SLACK_LISTENER_THREADS = 64  # Bolt listener threads; above the hard admission load so the backlog waits (visibly) in the agent queue
+SLASH_MAX_RESPONSES = 5  # Slack allows 5 posts per response_url
+
+# Query Log & Response Cache Configuration
+QUERY_LOG_PATH = "logs/queries.jsonl"  # Append-only log of answered queries
+RESPONSE_STORE_PATH = "data/response_store.json"  # Pre-generated answers
+RESPONSE_CACHE_TTL = 24 * 3600  # Seconds before a cached answer is stale
+RESPONSE_STORE_MAX_AGE = 7 * 24 * 3600  # Seconds before a stale answer is dropped (degraded mode reuses stale ones)
+CACHE_WARM_HOURS = [1, 2, 3, 4, 5]  # Off-peak local hours for pre-generation
+CACHE_WARM_INTERVAL = 900  # Seconds between warmer checks
+CACHE_WARM_LOOKBACK_DAYS = 7  # Query log window used to find hot questions
+CACHE_WARM_TOP_N = 25  # Max question clusters pre-generated per run
+CACHE_WARM_MIN_COUNT = 3  # Times a question must be asked to be warmed
+CACHE_WARM_LOCK_PATH = "data/cache_warmer.lock"  # Only the replica holding this lock warms
+CACHE_SIMILARITY = 0.8  # Word-overlap needed to treat questions as the same
+
+# Logging Configuration
+LOG_PATH = "logs/bot.jsonl"  # Structured JSON lines log
+LOG_LEVEL = "INFO"
+LOG_MAX_BYTES = 20 * 1024 * 1024  # Rotate the log file at this size
+LOG_BACKUP_COUNT = 5  # Rotated files kept
+LOG_QUEUE_SIZE = 10000  # Records buffered before new ones are dropped
+LOG_BATCH_SIZE = 256  # Records written per flush
+LOG_FLUSH_INTERVAL = 1.0  # Seconds before a partial batch is flushed
+SLACK_IO_WORKERS = 16  # Concurrent Slack API lookups across requests
+
+# Admission Control Configuration
+ADMISSION_SOFT_QUEUE = 8  # Queued + running agent calls before low-priority work is shed
+ADMISSION_HARD_QUEUE = 24  # Load at which new requests get degraded answers
+ADMISSION_SOFT_LATENCY = 15  # Recent avg seconds per answer before shedding low priority
+ADMISSION_HARD_LATENCY = RESPONSE_TIMEOUT  # Recent avg seconds before degrading
+ADMISSION_HIGH_QUEUE = 40  # Load at which high-priority requests (DMs, commands) are degraded too
+ADMISSION_HIGH_LATENCY = 2 * RESPONSE_TIMEOUT  # Recent avg seconds before degrading high priority
+ADMISSION_LATENCY_ALPHA = 0.2  # Weight of the newest latency in the moving average
+ADMISSION_LATENCY_STALE = 60  # Seconds after which the latency average is ignored
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive backend failures before opening
+BREAKER_RESET_TIMEOUT = 30  # Seconds before a trial call is let through
+DEGRADED_MODEL_NAME = "llama3.2:1b"  # Small model used for degraded answers
+DEGRADED_MAX_TOKENS = 200
+DEGRADED_MAX_CONCURRENCY = 2  # Degraded generations at once; beyond this requests are shed
+DEGRADED_SIMILARITY = 0.5  # Word-overlap for reusing a cached nearby answer
+METRICS_REPORT_INTERVAL = 60  # Seconds between metrics snapshots in the log
+
+# Multi-Workspace Configuration (enabled when SLACK_CLIENT_ID is set)
+INSTALLATION_STORE_DIR = "data/installations"  # OAuth installations, one dir per workspace
+OAUTH_STATE_DIR = "data/oauth_states"
+OAUTH_STATE_EXPIRATION = 600  # Seconds an install link stays valid
+SLACK_SCOPES = [
+    "app_mentions:read",
+    "channels:history",
+    "channels:read",
+    "chat:write",
+    "commands",
+    "files:read",
+    "groups:history",
+    "groups:read",
+    "im:history",
+    "im:read",
+    "im:write",
+    "users:read",
+]
+TENANT_REQUESTS_PER_MINUTE = 30  # Sustained agent requests per workspace
+TENANT_BURST = 10  # Requests a workspace may make at once above the rate
+HTTP_PORT = 3000  # Port for the HTTP server in multi-workspace mode
+
+# Model Backend Configuration
+AI_BACKEND = "ollama"  # "ollama" (external server) or "local" (in-process CPU)
+OLLAMA_MODEL_NAME = "llama3:8b"
+LOCAL_MODEL_NAME = "meta-llama/Llama-2-7b-chat-hf"  # Hugging Face model for the local backend
+LOCAL_QUANTIZE = True  # Dynamic int8 quantization of Linear layers
+LOCAL_MAX_BATCH_SIZE = 8  # Concurrent generations per forward pass
+LOCAL_MAX_NEW_TOKENS = AI_MAX_TOKENS
+
+# Campaign Metrics Configuration
+CAMPAIGN_CSV_CHUNKSIZE = 250_000  # Rows aggregated per chunk
+CAMPAIGN_MAX_FILE_BYTES = 500 * 1024 * 1024  # Largest CSV upload processed
+CAMPAIGN_SUMMARY_TOP_N = 5  # Rows per dimension in the prompt summary
+CAMPAIGN_METRICS_WORKERS = 2  # Concurrent CSV downloads and aggregations, apart from Slack lookups
+
+# Tool Calling Configuration
+TOOL_WORKERS = 4  # Tool calls from one model turn run concurrently
+TOOL_TIMEOUT = 5.0  # Seconds a single tool call may take
+TOOL_MAX_CALLS = 8  # Calls accepted from one planning turn
+TOOL_CACHE_SIZE = 512  # Tool results kept in the LRU cache
+TOOL_PLAN_MAX_TOKENS = 160  # Cap for the JSON tool plan (planned at temperature 0)
+
+# HTTP Events API Configuration
+SLACK_MODE = "socket"  # "socket" (one WebSocket) or "http" (Events API behind a load balancer)
+HTTP_HOST = "127.0.0.1"  # Bind address; replicas sit behind a local reverse proxy
+SLACK_EVENTS_PATH = "/slack/events"  # Request URL path for events, commands and interactivity
+SLACK_REQUEST_TOLERANCE = 300  # Seconds a signed request's timestamp may be off before it's rejected as a replay
+HTTP_MAX_BODY_BYTES = 1024 * 1024  # Larger request bodies are rejected
+HTTP_REPLICAS = 1  # Replicas behind the proxy (REPLICAS env var); tenant quotas are split between them
@@ -0,0 +1,274 @@
+"""
+Token-budgeted thread context with background rolling summarization
+
+Recent thread turns are kept verbatim; older turns are folded into a
+running summary that is regenerated off the request path, so the amount
+of history added to each prompt stays bounded no matter how long the
+thread gets.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_PROMPT = """Update the running summary of a Slack marketing conversation.
+Keep decisions, numbers, names, goals and open questions. Drop small talk.
+Answer with the updated summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer(name: str):
+    """Load the tokenizer once; None if transformers is unavailable"""
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name)
+    except Exception:
+        return None
+
+
+def warm_tokenizer() -> bool:
+    """
+    Load the context tokenizer ahead of the first request
+
+    Returns:
+        True if the tokenizer is available, False if counts are approximate
+    """
+    return _load_tokenizer(config.CONTEXT_TOKENIZER) is not None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text using the cached tokenizer
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Number of tokens (approximate if no tokenizer could be loaded)
+    """
+    if not text:
+        return 0
+
+    tokenizer = _load_tokenizer(config.CONTEXT_TOKENIZER)
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    # Roughly 4 characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text so it fits within a token budget
+
+    Args:
+        text: Text to truncate
+        max_tokens: Maximum number of tokens
+
+    Returns:
+        Text that fits within the budget
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Binary search on character length keeps tokenizer calls logarithmic
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def format_turn(msg: dict) -> str:
+    """Format a single Slack message as a context line"""
+    return f"- {msg.get('user', 'Unknown')}: {msg.get('text', '')}"
+
+
+class _ThreadSummary:
+    """Rolling summary state for one thread"""
+
+    __slots__ = ("text", "covered_ts", "pending")
+
+    def __init__(self):
+        self.text = ""
+        self.covered_ts = None  # ts of the last message folded into text
+        self.pending = False
+
+    def covers(self, msg: dict) -> bool:
+        """Whether a message is already folded into the summary"""
+        return self.covered_ts is not None and float(msg.get("ts", 0)) <= float(self.covered_ts)
+
+
+class ThreadContextCompactor:
+    """
+    Build bounded prompt context from Slack thread history
+
+    The most recent turns that fit in CONTEXT_RECENT_TOKENS are included
+    verbatim. Everything older is represented by a summary that is
+    refreshed in a background worker whenever new turns fall out of the
+    recent window; until it is ready the previous summary is used.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str], str],
+        token_budget: int = config.CONTEXT_TOKEN_BUDGET,
+        recent_tokens: int = config.CONTEXT_RECENT_TOKENS,
+        summary_tokens: int = config.CONTEXT_SUMMARY_TOKENS,
+        max_threads: int = config.CONTEXT_MAX_THREADS,
+    ):
+        """
+        Args:
+            summarize: Callable that takes a prompt and returns the model's text
+            token_budget: Max tokens of context returned by build_context
+            recent_tokens: Tokens reserved for verbatim recent turns
+            summary_tokens: Max tokens for the rolling summary
+            max_threads: Number of thread summaries kept in memory
+        """
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.recent_tokens = min(recent_tokens, token_budget)
+        self.summary_tokens = summary_tokens
+        self.max_threads = max_threads
+
+        self._summaries: "OrderedDict[str, _ThreadSummary]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="context-summarizer"
+        )
+
+    def _get_summary(self, thread_key: str) -> _ThreadSummary:
+        """Get or create summary state, evicting the least recently used"""
+        summary = self._summaries.get(thread_key)
+        if summary is None:
+            summary = _ThreadSummary()
+            self._summaries[thread_key] = summary
+            while len(self._summaries) > self.max_threads:
+                self._summaries.popitem(last=False)
+        else:
+            self._summaries.move_to_end(thread_key)
+        return summary
+
+    def summarized_through(self, thread_key: str) -> Optional[str]:
+        """
+        Timestamp up to which a thread is already summarized
+
+        Callers only need to fetch messages newer than this.
+
+        Args:
+            thread_key: Stable identifier for the thread
+
+        Returns:
+            ts of the last message folded into the summary, or None
+        """
+        with self._lock:
+            summary = self._summaries.get(thread_key)
+            return summary.covered_ts if summary is not None else None
+
+    def _split_recent(self, messages: List[dict]) -> Tuple[int, List[str]]:
+        """
+        Find the verbatim window at the end of the thread
+
+        Returns:
+            Index of the first recent message and the formatted recent lines
+        """
+        lines = []
+        used = 0
+        start = len(messages)
+        for msg in reversed(messages):
+            line = format_turn(msg)
+            tokens = count_tokens(line)
+            if lines and used + tokens > self.recent_tokens:
+                break
+            if not lines and tokens > self.recent_tokens:
+                line = truncate_to_tokens(line, self.recent_tokens)
+                tokens = self.recent_tokens
+            lines.append(line)
+            used += tokens
+            start -= 1
+        lines.reverse()
+        return start, lines
+
+    def build_context(self, thread_key: str, messages: List[dict]) -> str:
+        """
+        Create bounded context for a thread
+
+        Args:
+            thread_key: Stable identifier for the thread (e.g. "channel:thread_ts")
+            messages: Thread messages, oldest first; messages already
+                folded into the summary may be left out
+
+        Returns:
+            Formatted context string within the token budget
+        """
+        with self._lock:
+            summary = self._get_summary(thread_key)
+            summary_text = summary.text
+            # Coverage is tracked by ts because the fetched window slides
+            # as the thread grows (and already-folded turns may be omitted)
+            messages = [msg for msg in messages if not summary.covers(msg)]
+            start, recent_lines = self._split_recent(messages)
+            if start and not summary.pending:
+                summary.pending = True
+                self._executor.submit(
+                    self._refresh_summary, thread_key, summary, messages[:start]
+                )
+
+        if not messages and not summary_text:
+            return ""
+
+        context_parts = []
+        remaining = self.token_budget - sum(count_tokens(line) for line in recent_lines)
+        if summary_text and remaining > 0:
+            summary_text = truncate_to_tokens(
+                summary_text, min(self.summary_tokens, remaining)
+            )
+            context_parts.append(f"Summary of earlier conversation:\n{summary_text}")
+
+        context_parts.append("Previous conversation:")
+        context_parts.extend(recent_lines)
+
+        return "\n".join(context_parts)
+
+    def _refresh_summary(self, thread_key: str, summary: _ThreadSummary, new_turns: List[dict]):
+        """Fold newly aged-out turns into the summary (runs in background)"""
+        try:
+            prompt = SUMMARY_PROMPT.format(
+                max_words=int(self.summary_tokens * 0.75),
+                summary=summary.text or "(none yet)",
+                messages=truncate_to_tokens(
+                    "\n".join(format_turn(msg) for msg in new_turns),
+                    self.token_budget * 2,
+                ),
+            )
+            text = truncate_to_tokens(self.summarize(prompt).strip(), self.summary_tokens)
+            with self._lock:
+                summary.text = text
+                summary.covered_ts = new_turns[-1].get("ts")
+        except Exception as e:
+            logger.warning("Error summarizing thread %s: %s", thread_key, e)
+        finally:
+            with self._lock:
+                summary.pending = False
+
+    def shutdown(self, wait: bool = True):
+        """Stop the background summarizer"""
+        self._executor.shutdown(wait=wait)
@@ -3,12 +3,88 @@ Enhanced Agent with Marketing-Specific Features
 This is an advanced version you can use to replace agent.py
 """
 
-from typing import TypedDict, Annotated, Sequence, Literal
+from typing import TypedDict, Annotated, Sequence, Literal, Callable, List
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
 from datetime import datetime
 import json
+import logging
+import time
+
+from campaign_metrics import campaign_metrics_retriever
+from metrics import metrics
+from pipeline import LinearPipeline
+
+logger = logging.getLogger(__name__)
+
+
+# Prompt sections are built once at import, not on every request
+SPECIALIZED_PROMPTS = {
+    "strategy": """
+Focus Area: Marketing Strategy
+
+Provide strategic insights including:
+- Market analysis and positioning
+- Competitive landscape
+- Growth opportunities
+- Long-term planning frameworks
+
+Useful frameworks: SWOT, Porter's 5 Forces, Ansoff Matrix
+""",
+    "analytics": """
+Focus Area: Marketing Analytics
+
+Provide data-driven insights including:
+- Key performance indicators (KPIs)
+- Metric interpretation
+- ROI analysis
+- Performance recommendations
+
+Important metrics: CAC, LTV, ROAS, Conversion Rate, CTR
+""",
+    "content": """
+Focus Area: Content Marketing
+
+Provide content strategy guidance including:
+- Content planning and calendars
+- SEO optimization
+- Audience engagement tactics
+- Distribution strategies
+
+Useful frameworks: AIDA, Hero-Hub-Hygiene, Topic Clusters
+""",
+    "campaign": """
+Focus Area: Campaign Management
+
+Provide campaign insights including:
+- Campaign structure and setup
+- Targeting and segmentation
+- Budget allocation
+- Performance optimization
+""",
+    "general": """
+Provide comprehensive marketing guidance across all areas.
+"""
+}
+
+RESPONSE_GUIDELINES = """
+Response Guidelines:
+- Be concise but thorough
+- Use bullet points for clarity when listing 3+ items
+- Provide actionable recommendations
+- Include relevant examples when helpful
+- Ask clarifying questions if needed
+- Keep responses under 500 words for readability
+"""
+
+QUERY_FOOTERS = {
+    "strategy": "\n_💡 Need help with implementation? Ask me for specific tactics!_",
+    "analytics": "\n_📊 Want to dive deeper into specific metrics? Just ask!_",
+    "content": "\n_✍️ Need content ideas or templates? I can help with that!_",
+    "campaign": "\n_🚀 Ready to launch? Let me know if you need optimization tips!_",
+}
 
 
 class MarketingAgentState(TypedDict):
@@ -25,9 +101,27 @@ class EnhancedMarketingAgent:
     Advanced marketing agent with specialized capabilities
     """
     
-    def __init__(self, model_name: str = "gpt-4-turbo-preview", temperature: float = 0.7):
+    def __init__(
+        self,
+        model_name: str = "gpt-4-turbo-preview",
+        temperature: float = 0.7,
+        retrievers: List[Callable[[MarketingAgentState], dict]] = None,
+        executor: Literal["langgraph", "linear"] = "langgraph"
+    ):
         self.llm = ChatOpenAI(model=model_name, temperature=temperature)
-        self.graph = self._create_graph()
+        
+        # "linear" skips the LangGraph runtime for this straight-line graph
+        if executor == "linear":
+            self.graph = self._create_pipeline()
+        elif executor == "langgraph":
+            self.graph = self._create_graph()
+        else:
+            raise ValueError(f"Unknown executor: {executor}")
+        
+        # Context retrievers run alongside classification; each returns
+        # a dict merged into the state's context
+        self.retrievers = [campaign_metrics_retriever] + list(retrievers or [])
+        self._prepare_pool = ThreadPoolExecutor(thread_name_prefix="agent-prepare")
         
         # Marketing-specific knowledge
         self.marketing_frameworks = {
@@ -36,25 +130,56 @@ class EnhancedMarketingAgent:
             "analytics": ["CAC", "LTV", "ROAS", "CTR", "Conversion Rate"],
         }
         
+    def _create_pipeline(self) -> LinearPipeline:
+        """Same nodes as _create_graph, run by the minimal executor"""
+        return LinearPipeline(MarketingAgentState, [
+            ("prepare_context", self._prepare_context),
+            ("generate_response", self._generate_response),
+            ("format_output", self._format_output),
+        ])
+    
     def _create_graph(self) -> StateGraph:
         """Create enhanced LangGraph workflow"""
         workflow = StateGraph(MarketingAgentState)
         
         # Define nodes
-        workflow.add_node("classify_query", self._classify_query)
-        workflow.add_node("enrich_context", self._enrich_context)
+        workflow.add_node("prepare_context", self._prepare_context)
         workflow.add_node("generate_response", self._generate_response)
         workflow.add_node("format_output", self._format_output)
         
         # Define edges
-        workflow.set_entry_point("classify_query")
-        workflow.add_edge("classify_query", "enrich_context")
-        workflow.add_edge("enrich_context", "generate_response")
+        workflow.set_entry_point("prepare_context")
+        workflow.add_edge("prepare_context", "generate_response")
         workflow.add_edge("generate_response", "format_output")
         workflow.add_edge("format_output", END)
         
         return workflow.compile()
     
+    def _prepare_context(self, state: MarketingAgentState) -> MarketingAgentState:
+        """Classify the query and run context retrievers concurrently"""
+        start = time.perf_counter()
+        
+        retrieval = [self._prepare_pool.submit(retriever, state) for retriever in self.retrievers]
+        classified = self._classify_query(state)
+        
+        retrieved = {}
+        for retriever, future in zip(self.retrievers, retrieval):
+            try:
+                retrieved.update(future.result())
+            except Exception as e:
+                # The answer goes out without this context; leave a trace of why
+                name = getattr(retriever, "__name__", repr(retriever))
+                logger.warning("Error in context retriever %s: %s", name, e)
+                retrieved.setdefault("retrieval_errors", []).append(str(e))
+        
+        enriched = self._enrich_context({
+            "query_type": classified["query_type"],
+            "context": {**state.get("context", {}), **retrieved}
+        })
+        
+        metrics.observe("enhanced_agent.prepare_seconds", time.perf_counter() - start)
+        return {**classified, **enriched}
+    
     def _classify_query(self, state: MarketingAgentState) -> MarketingAgentState:
         """Classify the type of marketing query"""
         messages = state["messages"]
@@ -73,17 +198,15 @@ class EnhancedMarketingAgent:
         elif any(word in text_lower for word in ["campaign", "ad", "advertising"]):
             query_type = "campaign"
         
-        return {
-            **state,
-            "query_type": query_type
-        }
+        return {"query_type": query_type}
     
     def _enrich_context(self, state: MarketingAgentState) -> MarketingAgentState:
         """Add relevant marketing context based on query type"""
         query_type = state.get("query_type", "general")
         
-        # Add relevant frameworks or knowledge
+        # Add relevant frameworks or knowledge on top of retrieved context
         context = {
+            **state.get("context", {}),
             "frameworks": self.marketing_frameworks.get(query_type, []),
             "timestamp": datetime.now().isoformat(),
         }
@@ -98,10 +221,7 @@ class EnhancedMarketingAgent:
                 "CTR (Click-Through Rate)"
             ]
         
-        return {
-            **state,
-            "context": context
-        }
+        return {"context": context}
     
     def _generate_response(self, state: MarketingAgentState) -> MarketingAgentState:
         """Generate AI response with enhanced context"""
@@ -122,17 +242,14 @@ class EnhancedMarketingAgent:
         # Generate response
         response = self.llm.invoke(llm_messages)
         
-        return {
-            **state,
-            "messages": [response]
-        }
+        return {"messages": [response]}
     
     def _format_output(self, state: MarketingAgentState) -> MarketingAgentState:
         """Format the output for Slack"""
         messages = state["messages"]
         
         if not messages:
-            return state
+            return {}
         
         last_message = messages[-1]
         
@@ -144,7 +261,8 @@ class EnhancedMarketingAgent:
             enhanced_content = f"{last_message.content}\n\n{footer}"
             last_message.content = enhanced_content
         
-        return state
+        # The message was updated in place; no state keys change
+        return {}
     
     def _create_specialized_prompt(
         self, 
@@ -166,79 +284,22 @@ Current Context:
 - Date: {datetime.now().strftime('%Y-%m-%d')}
 """
         
-        # Add specialized instructions
-        specialized_prompts = {
-            "strategy": """
-Focus Area: Marketing Strategy
-
-Provide strategic insights including:
-- Market analysis and positioning
-- Competitive landscape
-- Growth opportunities
-- Long-term planning frameworks
-
-Useful frameworks: SWOT, Porter's 5 Forces, Ansoff Matrix
-""",
-            "analytics": """
-Focus Area: Marketing Analytics
-
-Provide data-driven insights including:
-- Key performance indicators (KPIs)
-- Metric interpretation
-- ROI analysis
-- Performance recommendations
-
-Important metrics: CAC, LTV, ROAS, Conversion Rate, CTR
-""",
-            "content": """
-Focus Area: Content Marketing
-
-Provide content strategy guidance including:
-- Content planning and calendars
-- SEO optimization
-- Audience engagement tactics
-- Distribution strategies
-
-Useful frameworks: AIDA, Hero-Hub-Hygiene, Topic Clusters
-""",
-            "campaign": """
-Focus Area: Campaign Management
-
-Provide campaign insights including:
-- Campaign structure and setup
-- Targeting and segmentation
-- Budget allocation
-- Performance optimization
-""",
-            "general": """
-Provide comprehensive marketing guidance across all areas.
-"""
-        }
-        
-        specialized_section = specialized_prompts.get(query_type, specialized_prompts["general"])
+        specialized_section = SPECIALIZED_PROMPTS.get(query_type, SPECIALIZED_PROMPTS["general"])
         
-        guidelines = """
-Response Guidelines:
-- Be concise but thorough
-- Use bullet points for clarity when listing 3+ items
-- Provide actionable recommendations
-- Include relevant examples when helpful
-- Ask clarifying questions if needed
-- Keep responses under 500 words for readability
+        if context.get("campaign_metrics"):
+            specialized_section += f"""
+Computed Campaign Metrics (exact values from the user's data):
+{context["campaign_metrics"]}
+
+Use these numbers as given. Do not recalculate them; explain what they
+mean and recommend actions based on them.
 """
         
-        return base_prompt + specialized_section + guidelines
+        return base_prompt + specialized_section + RESPONSE_GUIDELINES
     
     def _get_query_footer(self, query_type: str) -> str:
         """Get a helpful footer based on query type"""
-        footers = {
-            "strategy": "\n_💡 Need help with implementation? Ask me for specific tactics!_",
-            "analytics": "\n_📊 Want to dive deeper into specific metrics? Just ask!_",
-            "content": "\n_✍️ Need content ideas or templates? I can help with that!_",
-            "campaign": "\n_🚀 Ready to launch? Let me know if you need optimization tips!_",
-        }
-        
-        return footers.get(query_type, "")
+        return QUERY_FOOTERS.get(query_type, "")
     
     def run(
         self, 
@@ -0,0 +1,240 @@
+"""
+HTTP Events API server for the Slack AI Bot
+
+A small ASGI app, served by uvicorn, that replaces Socket Mode when the
+bot runs behind a load balancer. Every request is verified against the
+signing secret in constant time and rejected if its timestamp is too old
+to be anything but a replay. Events are acked with 200 straight away and
+dispatched to the Bolt app on the agent queue; slash commands and
+interactivity are dispatched inline because Bolt's ack() carries their
+response body. Any replica can serve any request, so several can sit
+behind one reverse proxy (see deploy/nginx.conf). Replicas on one host
+share the query log and response store files: one replica at a time
+(holding a file lock) warms the cache, and the others reload the store.
+Tenant quotas are per process and split by REPLICAS.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+from slack_bolt import App, BoltResponse
+from slack_bolt.request import BoltRequest
+
+import config
+from agent_queue import agent_queue
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def verify_slack_signature(
+    signing_secret: bytes,
+    timestamp: str,
+    body: bytes,
+    signature: str,
+    tolerance: float = config.SLACK_REQUEST_TOLERANCE,
+    now: Optional[float] = None
+) -> bool:
+    """
+    Check a request's X-Slack-Signature
+
+    Args:
+        signing_secret: App signing secret, already encoded
+        timestamp: X-Slack-Request-Timestamp header
+        body: Raw request body
+        signature: X-Slack-Signature header ("v0=<hex>")
+        tolerance: Maximum age (or clock skew) in seconds
+        now: Current time, for tests
+
+    Returns:
+        True if the signature matches and the timestamp is fresh
+    """
+    try:
+        issued = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs((now if now is not None else time.time()) - issued) > tolerance:
+        return False
+
+    expected = "v0=" + hmac.new(
+        signing_secret, b"v0:" + timestamp.encode() + b":" + body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected.encode(), (signature or "").encode())
+
+
+class SlackEventsApp:
+    """
+    ASGI app serving Slack's Events API, commands, interactivity and OAuth
+
+    Routes:
+        POST {SLACK_EVENTS_PATH}  events, slash commands, interactivity
+        GET  /slack/install, /slack/oauth_redirect  OAuth (multi-workspace only)
+        GET  /healthz  liveness for the load balancer
+        GET  /metrics  in-process metrics snapshot
+    """
+
+    def __init__(
+        self,
+        bolt_app: App,
+        signing_secret: str,
+        on_shutdown: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            bolt_app: App built with request verification disabled (verified here)
+            signing_secret: Slack signing secret
+            on_shutdown: Called when the server stops, e.g. to drain acked events
+        """
+        self.bolt_app = bolt_app
+        self.signing_secret = signing_secret.encode()
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path, method = scope["path"], scope["method"]
+        if path == config.SLACK_EVENTS_PATH and method == "POST":
+            await self._handle_slack(scope, receive, send)
+        elif method == "GET" and path == "/healthz":
+            await self._respond(send, 200, b"ok")
+        elif method == "GET" and path == "/metrics":
+            snapshot = metrics.snapshot()
+            snapshot["agent_queue"] = {"depth": agent_queue.depth, "pending": agent_queue.pending}
+            await self._respond(send, 200, json.dumps(snapshot).encode(), "application/json")
+        elif method == "GET" and self._is_oauth_path(path):
+            await self._handle_oauth(scope, send)
+        else:
+            await self._respond(send, 404, b"not found")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.on_shutdown:
+                    self.on_shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle_slack(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            await self._respond(send, 413, b"payload too large")
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        if not verify_slack_signature(
+            self.signing_secret,
+            headers.get("x-slack-request-timestamp"),
+            body,
+            headers.get("x-slack-signature")
+        ):
+            metrics.increment("http.rejected", reason="signature")
+            await self._respond(send, 401, b"invalid signature")
+            return
+
+        if headers.get("content-type", "").startswith("application/json"):
+            payload = json.loads(body)
+            if payload.get("type") == "url_verification":
+                await self._respond(send, 200, payload.get("challenge", "").encode(), "text/plain")
+                return
+
+            # Slack retries when an ack was late; the original is already queued
+            if headers.get("x-slack-retry-reason") == "http_timeout":
+                metrics.increment("http.retries_skipped")
+                await self._respond(send, 200, b"")
+                return
+
+            metrics.increment("http.events")
+            agent_queue.submit(self._dispatch_event, body, headers)
+            await self._respond(send, 200, b"")
+            return
+
+        # Commands and interactivity: the ack body is the user-visible reply
+        metrics.increment("http.commands")
+        loop = asyncio.get_running_loop()
+        request = BoltRequest(body=body.decode("utf-8"), headers=headers)
+        response = await loop.run_in_executor(None, self.bolt_app.dispatch, request)
+        await self._send_bolt_response(send, response)
+
+    def _dispatch_event(self, body: bytes, headers: dict):
+        """Run an already-acked event through Bolt on an agent queue worker"""
+        try:
+            response = self.bolt_app.dispatch(BoltRequest(body=body.decode("utf-8"), headers=headers))
+            if response.status >= 400:
+                logger.warning("Event dispatch returned %s: %s", response.status, response.body)
+        except Exception as e:
+            logger.exception("Error dispatching event: %s", e)
+
+    def _is_oauth_path(self, path: str) -> bool:
+        flow = self.bolt_app.oauth_flow
+        return flow is not None and path in (flow.install_path, flow.redirect_uri_path)
+
+    async def _handle_oauth(self, scope, send):
+        flow = self.bolt_app.oauth_flow
+        query = scope.get("query_string", b"").decode("latin-1")
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        request = BoltRequest(body="", query=parse_qs(query), headers=headers)
+
+        handler = flow.handle_installation if scope["path"] == flow.install_path else flow.handle_callback
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, handler, request)
+        await self._send_bolt_response(send, response)
+
+    @staticmethod
+    async def _read_body(receive) -> Optional[bytes]:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > config.HTTP_MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, content_type: str = "text/plain"):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _send_bolt_response(send, response: BoltResponse):
+        body = (response.body or "").encode("utf-8")
+        headers = [(b"content-length", str(len(body)).encode())]
+        for name, values in response.headers.items():
+            if name.lower() == "content-length":
+                continue
+            for value in values:
+                headers.append((name.encode("latin-1"), str(value).encode("latin-1")))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def serve(asgi_app: SlackEventsApp, host: str = config.HTTP_HOST, port: int = config.HTTP_PORT):
+    """
+    Run the app with uvicorn (blocks until shutdown)
+
+    One process per replica; scale out by starting more replicas on other
+    ports behind the reverse proxy rather than forking workers, so each
+    keeps its own model client pool and log file.
+    """
+    import uvicorn
+
+    uvicorn.run(asgi_app, host=host, port=port, log_level="warning", access_log=False)
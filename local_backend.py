@@ -0,0 +1,386 @@
+"""
+In-process Hugging Face backend for CPU inference
+
+Weights are loaded once per model and shared by every chat model
+instance. Concurrent requests are served by a continuous batcher: new
+requests join the running batch between decode steps and finished ones
+leave it, so one forward pass advances every active generation.
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Iterator, List, Optional
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import config
+
+try:
+    from transformers import DynamicCache
+except ImportError:  # Older transformers only use tuple caches
+    DynamicCache = None
+
+logger = logging.getLogger(__name__)
+
+_models = {}
+_batchers = {}
+_load_lock = threading.Lock()
+
+
+def load_model(model_name: str, quantize: bool = False):
+    """
+    Load a causal LM and its tokenizer once per process
+
+    Args:
+        model_name: Hugging Face model ID or local path
+        quantize: Apply dynamic int8 quantization to Linear layers
+
+    Returns:
+        Tuple of (tokenizer, model)
+    """
+    key = (model_name, quantize)
+    with _load_lock:
+        if key not in _models:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            # Keep the checkpoint's dtype (fp16/bf16 for most chat models) so
+            # only one half-precision copy of the weights is ever resident
+            model = AutoModelForCausalLM.from_pretrained(
+                model_name,
+                torch_dtype="auto",
+                low_cpu_mem_usage=True
+            )
+            model.eval()
+            if quantize:
+                _quantize_linear_layers(model)
+            _models[key] = (tokenizer, model)
+        return _models[key]
+
+
+def _quantize_linear_layers(model):
+    """
+    Dynamic int8 quantization of every Linear layer, in place
+
+    Layers are upcast and quantized one at a time, so peak memory is the
+    half-precision model plus a single fp32 layer rather than a full fp32
+    copy. The remaining (small) parameters are then cast to fp32, which
+    the quantized kernels expect as input.
+    """
+    qconfig = torch.ao.quantization.default_dynamic_qconfig
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if type(child) is torch.nn.Linear:
+                child = child.float()
+                child.qconfig = qconfig
+                setattr(parent, name, torch.ao.nn.quantized.dynamic.Linear.from_float(child))
+    model.float()
+
+
+def _to_legacy(past_key_values) -> tuple:
+    """Get ((key, value), ...) per layer from any cache representation"""
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    if hasattr(past_key_values, "layers"):
+        return tuple((layer.keys, layer.values) for layer in past_key_values.layers)
+    return past_key_values
+
+
+def _from_legacy(layers: list):
+    """Wrap per-layer (key, value) tensors in the cache type the model expects"""
+    legacy = tuple(tuple(layer) for layer in layers)
+    if DynamicCache is None:
+        return legacy
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(legacy)
+    return DynamicCache(legacy)
+
+
+class GenerationRequest:
+    """One generation in the batch; text pieces arrive on `chunks`"""
+
+    def __init__(self, prompt_ids: List[int], max_new_tokens: int, temperature: float, stop: List[str]):
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.stop = stop or []
+        self.generated: List[int] = []
+        self.text = ""
+        self.chunks: "queue.Queue" = queue.Queue()
+        self.cancelled = False
+
+    def iter_chunks(self) -> Iterator[str]:
+        """Yield generated text as it is produced"""
+        while True:
+            item = self.chunks.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class ContinuousBatcher:
+    """
+    Iteration-level scheduler over a shared model
+
+    The batch keeps one left-padded KV cache. A joining request is
+    prefilled on its own and its cache is padded and concatenated into
+    the batch; finished requests are dropped by index.
+    """
+
+    def __init__(self, tokenizer, model, max_batch_size: int = config.LOCAL_MAX_BATCH_SIZE):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_batch_size = max_batch_size
+
+        eos = model.generation_config.eos_token_id
+        if eos is None:
+            eos = tokenizer.eos_token_id
+        self.eos_ids = set(eos if isinstance(eos, list) else [eos])
+
+        self._waiting: "queue.Queue[GenerationRequest]" = queue.Queue()
+        self._active: List[GenerationRequest] = []
+        self._cache = None      # List of [key, value] per layer, batch-first
+        self._mask = None       # [batch, cache_len] attention mask
+        self._last_tokens = None  # [batch, 1] next input tokens
+
+        self._thread = threading.Thread(target=self._loop, name="local-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt_ids: List[int], max_new_tokens: int, temperature: float, stop: List[str] = None) -> GenerationRequest:
+        """Queue a generation; it joins the batch at the next step"""
+        request = GenerationRequest(prompt_ids, max_new_tokens, temperature, stop)
+        self._waiting.put(request)
+        return request
+
+    def _loop(self):
+        with torch.inference_mode():
+            while True:
+                try:
+                    self._admit()
+                    if self._active:
+                        self._decode_step()
+                except Exception as e:
+                    logger.exception("Local backend batch failed: %s", e)
+                    for request in self._active:
+                        request.chunks.put(e)
+                    self._active, self._cache, self._mask, self._last_tokens = [], None, None, None
+
+    def _admit(self):
+        # Block only when there is nothing to decode
+        block = not self._active
+        while len(self._active) < self.max_batch_size:
+            try:
+                request = self._waiting.get(block=block)
+            except queue.Empty:
+                return
+            block = False
+            if request.cancelled:
+                continue
+            try:
+                self._prefill(request)
+            except Exception as e:
+                # A bad prompt only fails its own request
+                logger.warning("Local backend prefill failed: %s", e)
+                request.chunks.put(e)
+
+    def _sample(self, logits: torch.Tensor, temperatures: torch.Tensor) -> torch.Tensor:
+        """Pick one token per row; temperature 0 means greedy"""
+        greedy = logits.argmax(dim=-1)
+        # Greedy rows get a neutral temperature so sampling stays finite
+        safe = torch.where(temperatures > 0, temperatures, torch.ones_like(temperatures))
+        scaled = logits.float() / safe.unsqueeze(-1)
+        sampled = torch.multinomial(torch.softmax(scaled, dim=-1), 1).squeeze(-1)
+        return torch.where(temperatures > 0, sampled, greedy)
+
+    def _prefill(self, request: GenerationRequest):
+        input_ids = torch.tensor([request.prompt_ids])
+        output = self.model(input_ids=input_ids, use_cache=True)
+        layers = [list(layer) for layer in _to_legacy(output.past_key_values)]
+        mask = torch.ones(1, input_ids.shape[1], dtype=torch.long)
+        token = self._sample(output.logits[:, -1, :], torch.tensor([float(request.temperature)]))
+
+        if self._cache is None:
+            self._cache, self._mask = layers, mask
+            self._last_tokens = token.unsqueeze(-1)
+        else:
+            self._cache, self._mask = self._merge(layers, mask)
+            self._last_tokens = torch.cat([self._last_tokens, token.unsqueeze(-1)])
+
+        self._active.append(request)
+        if self._emit(request, token.item()):
+            self._drop([len(self._active) - 1])
+
+    def _merge(self, layers: list, mask: torch.Tensor):
+        """Left-pad the shorter cache and append the new sequence to the batch"""
+        batch_len, new_len = self._mask.shape[1], mask.shape[1]
+        target = max(batch_len, new_len)
+
+        def pad(tensor, length, dim):
+            if length == 0:
+                return tensor
+            shape = list(tensor.shape)
+            shape[dim] = length
+            return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+        merged = [
+            [
+                torch.cat([pad(old, target - batch_len, 2), pad(new, target - new_len, 2)])
+                for old, new in zip(old_layer, new_layer)
+            ]
+            for old_layer, new_layer in zip(self._cache, layers)
+        ]
+        merged_mask = torch.cat([pad(self._mask, target - batch_len, 1), pad(mask, target - new_len, 1)])
+        return merged, merged_mask
+
+    def _decode_step(self):
+        mask = torch.cat([self._mask, self._mask.new_ones(len(self._active), 1)], dim=1)
+        # Positions count only real tokens, so left padding doesn't shift them
+        position_ids = self._mask.sum(dim=1, keepdim=True)
+
+        output = self.model(
+            input_ids=self._last_tokens,
+            attention_mask=mask,
+            position_ids=position_ids,
+            past_key_values=_from_legacy(self._cache),
+            use_cache=True
+        )
+        self._cache = [list(layer) for layer in _to_legacy(output.past_key_values)]
+        self._mask = mask
+
+        temperatures = torch.tensor([float(r.temperature) for r in self._active])
+        tokens = self._sample(output.logits[:, -1, :], temperatures)
+        self._last_tokens = tokens.unsqueeze(-1)
+
+        finished = [
+            index for index, (request, token) in enumerate(zip(self._active, tokens.tolist()))
+            if self._emit(request, token)
+        ]
+        if finished:
+            self._drop(finished)
+
+    def _emit(self, request: GenerationRequest, token: int) -> bool:
+        """Stream a sampled token; returns True if the request is finished"""
+        if request.cancelled:
+            request.chunks.put(None)
+            return True
+
+        done = token in self.eos_ids
+        if not done:
+            request.generated.append(token)
+            text = self.tokenizer.decode(request.generated, skip_special_tokens=True)
+            # Hold back incomplete multi-byte characters
+            if not text.endswith("�"):
+                for stop in request.stop:
+                    if stop in text:
+                        text, done = text[:text.index(stop)], True
+                if len(text) > len(request.text):
+                    request.chunks.put(text[len(request.text):])
+                    request.text = text
+
+        if done or len(request.generated) >= request.max_new_tokens:
+            request.chunks.put(None)
+            return True
+        return False
+
+    def _drop(self, indices: List[int]):
+        """Remove finished sequences and trim padding no sequence needs"""
+        keep = [i for i in range(len(self._active)) if i not in set(indices)]
+        self._active = [self._active[i] for i in keep]
+        if not keep:
+            self._cache, self._mask, self._last_tokens = None, None, None
+            return
+
+        index = torch.tensor(keep)
+        mask = self._mask.index_select(0, index)
+        start = int((mask.sum(dim=0) == 0).long().cumprod(dim=0).sum())
+        self._mask = mask[:, start:]
+        self._last_tokens = self._last_tokens.index_select(0, index)
+        self._cache = [
+            [tensor.index_select(0, index)[:, :, start:] for tensor in layer]
+            for layer in self._cache
+        ]
+
+
+def get_batcher(model_name: str, quantize: bool = False, max_batch_size: int = config.LOCAL_MAX_BATCH_SIZE) -> ContinuousBatcher:
+    """Get the shared batcher for a model, loading it on first use"""
+    key = (model_name, quantize)
+    with _load_lock:
+        batcher = _batchers.get(key)
+    if batcher is None:
+        tokenizer, model = load_model(model_name, quantize)
+        with _load_lock:
+            batcher = _batchers.setdefault(key, ContinuousBatcher(tokenizer, model, max_batch_size))
+    return batcher
+
+
+class LocalChatModel(BaseChatModel):
+    """LangChain chat model backed by the shared in-process batcher"""
+
+    model_name: str = config.LOCAL_MODEL_NAME
+    temperature: float = 0.7
+    max_new_tokens: int = config.LOCAL_MAX_NEW_TOKENS
+    quantize: bool = config.LOCAL_QUANTIZE
+    max_batch_size: int = config.LOCAL_MAX_BATCH_SIZE
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-hf"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name, "quantize": self.quantize}
+
+    def _encode(self, tokenizer, messages: List[BaseMessage]) -> List[int]:
+        roles = {SystemMessage: "system", HumanMessage: "user", AIMessage: "assistant"}
+        chat = [{"role": roles.get(type(m), "user"), "content": m.content} for m in messages]
+
+        if getattr(tokenizer, "chat_template", None):
+            # transformers 5 returns a BatchEncoding unless told otherwise
+            return tokenizer.apply_chat_template(chat, add_generation_prompt=True, return_dict=False)
+
+        prompt = "\n".join(f"{turn['role'].title()}: {turn['content']}" for turn in chat)
+        return tokenizer.encode(prompt + "\nAssistant:")
+
+    def _start(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs) -> GenerationRequest:
+        batcher = get_batcher(self.model_name, self.quantize, self.max_batch_size)
+        return batcher.submit(
+            self._encode(batcher.tokenizer, messages),
+            max_new_tokens=kwargs.get("max_new_tokens", self.max_new_tokens),
+            temperature=kwargs.get("temperature", self.temperature),
+            stop=stop
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        request = self._start(messages, stop, **kwargs)
+        try:
+            for piece in request.iter_chunks():
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if run_manager:
+                    run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+        finally:
+            # Consumer stopped early: free the batch slot
+            request.cancelled = True
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
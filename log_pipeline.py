@@ -0,0 +1,277 @@
+"""
+Non-blocking structured logging
+
+Handlers only put records on a bounded in-memory queue. A background
+writer thread formats them as JSON lines and writes them in batches to a
+size-rotated file, so request threads never do log I/O themselves.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import config
+
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 4),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can't safely cross threads; JSON formatting
+        # happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingLogWriter:
+    """
+    Background thread that drains the log queue into handlers
+
+    Records are handled as they arrive but streams are only flushed once
+    per batch (or after flush_interval when the queue goes quiet).
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: list, batch_size: int, flush_interval: float):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _handle(self, record: logging.LogRecord):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            self._handle(record)
+            pending = 1
+            while pending < self.batch_size:
+                try:
+                    self._handle(self.queue.get_nowait())
+                    pending += 1
+                except queue.Empty:
+                    break
+            self._flush()
+
+    def stop(self):
+        """Write out everything still queued and stop the thread"""
+        self._stop.set()
+        self._thread.join()
+        self._flush()
+        for handler in self.handlers:
+            handler.close()
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """Append-only file handler whose per-record flush is left to the writer"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler whose per-record flush is left to the writer"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+_writer = None
+_query_log_path = None
+
+# Records on this logger are complete JSON lines bound for the query log
+QUERY_LOGGER_NAME = "query_log"
+
+
+def query_log_handled(path: str) -> bool:
+    """Whether the background writer is appending query records to path"""
+    return _query_log_path is not None and os.path.abspath(path) == _query_log_path
+
+
+def setup_logging(
+    path: str = config.LOG_PATH,
+    level: str = config.LOG_LEVEL,
+    console_level: str = "WARNING",
+    query_log_path: str = config.QUERY_LOG_PATH
+) -> BatchingLogWriter:
+    """
+    Route all logging through the background JSON writer
+
+    Args:
+        path: Log file path (rotated by size)
+        level: Minimum level written to the file
+        console_level: Minimum level also echoed to stderr
+        query_log_path: Append-only file for QUERY_LOGGER_NAME records
+            (not rotated, since replicas may share it)
+
+    Returns:
+        The running writer (call stop() on shutdown to flush)
+    """
+    global _writer, _query_log_path
+    if _writer is not None:
+        return _writer
+
+    for directory in {os.path.dirname(path), os.path.dirname(query_log_path)}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    file_handler = _BufferedRotatingFileHandler(
+        path,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True
+    )
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    query_handler = _BufferedFileHandler(query_log_path, encoding="utf-8", delay=True)
+    query_handler.setLevel(logging.INFO)
+    query_handler.setFormatter(logging.Formatter("%(message)s"))
+    query_handler.addFilter(lambda record: record.name == QUERY_LOGGER_NAME)
+    for handler in (file_handler, console_handler):
+        handler.addFilter(lambda record: record.name != QUERY_LOGGER_NAME)
+    logging.getLogger(QUERY_LOGGER_NAME).setLevel(logging.INFO)
+
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(min(file_handler.level, console_handler.level))
+
+    _writer = BatchingLogWriter(
+        log_queue,
+        [file_handler, console_handler, query_handler],
+        batch_size=config.LOG_BATCH_SIZE,
+        flush_interval=config.LOG_FLUSH_INTERVAL
+    )
+    _writer.start()
+    _query_log_path = os.path.abspath(query_log_path)
+    return _writer
+
+
+class RequestTrace:
+    """
+    Collects stage timings and token counts for one request
+
+    Usage:
+        trace = RequestTrace("app_mention", user=user_id)
+        with trace.stage("agent"):
+            ...
+        trace.finish(logger, completion_tokens=42)
+    """
+
+    def __init__(self, kind: str, **fields):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.fields = fields
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the request"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - start, 4)
+
+    def add_stage(self, name: str, seconds: float):
+        """Record a stage timed elsewhere"""
+        self.stages[name] = round(seconds, 4)
+
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.perf_counter() - self._start
+
+    def finish(self, logger: logging.Logger, status: str = "ok", **fields):
+        """Emit the structured request log line"""
+        logger.info(
+            "request %s",
+            status,
+            extra={
+                "request_id": self.request_id,
+                "kind": self.kind,
+                "status": status,
+                "total_seconds": round(self.elapsed(), 4),
+                "stages": self.stages,
+                **self.fields,
+                **fields,
+            }
+        )
@@ -0,0 +1,274 @@
+"""
+Marketing calculation and lookup tools
+
+Deterministic tools the agent can call instead of doing arithmetic in a
+free-form generation, plus a runner that executes the independent tool
+calls from one model turn concurrently with per-call timeouts and a
+shared result cache.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List
+
+from langchain_core.tools import tool
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+MARKETING_FRAMEWORKS = {
+    "SWOT": "Strengths, Weaknesses (internal) vs Opportunities, Threats (external). Use for positioning and planning.",
+    "Porter's 5 Forces": "Rivalry, threat of new entrants, threat of substitutes, buyer power, supplier power. Use to judge market attractiveness.",
+    "Ansoff Matrix": "Market penetration, product development, market development, diversification. Use to pick a growth path by risk.",
+    "BCG Matrix": "Stars, cash cows, question marks, dogs by market growth vs relative share. Use for portfolio budget decisions.",
+    "AIDA": "Attention, Interest, Desire, Action. Use to structure ads, landing pages and emails.",
+    "Hero-Hub-Hygiene": "Hero: big tentpole moments; Hub: regular episodic content; Hygiene: always-on search-driven content.",
+    "Pillar-Cluster": "A broad pillar page linked to cluster pages on subtopics. Use for SEO topical authority.",
+    "RACE": "Reach, Act, Convert, Engage. Use to plan the digital funnel end to end.",
+    "STP": "Segmentation, Targeting, Positioning. Use before messaging and channel choices.",
+}
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return round(numerator / denominator, 4) if denominator else float("nan")
+
+
+@tool
+def calculate_roas(revenue: float, ad_spend: float) -> dict:
+    """Return on ad spend: revenue attributed to ads divided by ad spend."""
+    return {"roas": _ratio(revenue, ad_spend), "revenue": revenue, "ad_spend": ad_spend}
+
+
+@tool
+def calculate_cac(marketing_spend: float, new_customers: float) -> dict:
+    """Customer acquisition cost: total sales and marketing spend divided by new customers."""
+    return {"cac": _ratio(marketing_spend, new_customers)}
+
+
+@tool
+def calculate_ltv(
+    average_order_value: float,
+    purchases_per_year: float,
+    customer_lifespan_years: float,
+    gross_margin: float = 1.0
+) -> dict:
+    """Customer lifetime value: order value x purchase frequency x lifespan x gross margin (0-1)."""
+    ltv = average_order_value * purchases_per_year * customer_lifespan_years * gross_margin
+    return {"ltv": round(ltv, 2)}
+
+
+@tool
+def calculate_ltv_cac_ratio(ltv: float, cac: float) -> dict:
+    """LTV to CAC ratio; around 3 or more is usually considered healthy."""
+    return {"ltv_cac_ratio": _ratio(ltv, cac)}
+
+
+@tool
+def calculate_conversion_rate(conversions: float, visitors: float) -> dict:
+    """Conversion rate: conversions divided by visitors or clicks."""
+    return {"conversion_rate": _ratio(conversions, visitors)}
+
+
+@tool
+def calculate_ctr(clicks: float, impressions: float) -> dict:
+    """Click-through rate: clicks divided by impressions."""
+    return {"ctr": _ratio(clicks, impressions)}
+
+
+@tool
+def allocate_budget(total_budget: float, channel_weights: Dict[str, float], min_share: float = 0.05) -> dict:
+    """
+    Split a budget across channels in proportion to their weights (e.g. ROAS),
+    guaranteeing each channel at least min_share of the total.
+    """
+    if not channel_weights:
+        return {"error": "No channels given"}
+
+    channels = list(channel_weights)
+    floor = min(min_share, 1.0 / len(channels))
+    remaining = total_budget * (1 - floor * len(channels))
+    total_weight = sum(max(w, 0.0) for w in channel_weights.values())
+
+    allocation = {}
+    for channel in channels:
+        weight = max(channel_weights[channel], 0.0)
+        share = weight / total_weight if total_weight else 1.0 / len(channels)
+        allocation[channel] = round(total_budget * floor + remaining * share, 2)
+    return {"allocation": allocation}
+
+
+@tool
+def lookup_framework(name: str) -> dict:
+    """Describe a marketing framework such as SWOT, AIDA, Ansoff Matrix or Pillar-Cluster."""
+    key = name.strip().lower()
+    for framework, description in MARKETING_FRAMEWORKS.items():
+        if framework.lower() == key or key in framework.lower():
+            return {"framework": framework, "description": description}
+    return {"error": f"Unknown framework: {name}", "known": list(MARKETING_FRAMEWORKS)}
+
+
+MARKETING_TOOLS = [
+    calculate_roas,
+    calculate_cac,
+    calculate_ltv,
+    calculate_ltv_cac_ratio,
+    calculate_conversion_rate,
+    calculate_ctr,
+    allocate_budget,
+    lookup_framework,
+]
+
+TOOLS_BY_NAME = {t.name: t for t in MARKETING_TOOLS}
+
+# Cheap pre-checks so ordinary questions skip the tool-planning turn:
+# calculators need a metric keyword and numbers, lookups a framework name
+CALCULATION_PATTERN = re.compile(
+    r"\b(roas|cac|ltv|ctr|conversion rate|click-through|budget|allocate|split|calculate|compute)\b"
+)
+NUMBER_PATTERN = re.compile(r"\d")
+FRAMEWORK_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(name.lower()) for name in MARKETING_FRAMEWORKS) + r")\b"
+)
+
+TOOL_PLANNING_PROMPT = """You can call these marketing tools:
+{tools}
+
+Question: {question}
+
+If answering needs any of these tools, reply with ONLY a JSON list of calls
+that can run independently, e.g. [{{"tool": "calculate_roas", "args": {{"revenue": 5000, "ad_spend": 1000}}}}].
+Use only numbers stated in the question. Reply with [] if no tool is needed."""
+
+
+def needs_tools(text: str) -> bool:
+    """Whether a question could benefit from tool calls"""
+    text = text.lower()
+    if FRAMEWORK_PATTERN.search(text):
+        return True
+    return bool(NUMBER_PATTERN.search(text) and CALCULATION_PATTERN.search(text))
+
+
+def describe_tools() -> str:
+    """One line per tool for the planning prompt"""
+    lines = []
+    for t in MARKETING_TOOLS:
+        args = ", ".join(t.args)
+        lines.append(f"- {t.name}({args}): {' '.join(t.description.split())}")
+    return "\n".join(lines)
+
+
+def parse_tool_calls(text: str) -> List[dict]:
+    """
+    Extract tool calls from the model's planning reply
+
+    Args:
+        text: Model output expected to contain a JSON list
+
+    Returns:
+        Valid calls to known tools (unknown tools and bad JSON are dropped)
+    """
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        return []
+    try:
+        calls = json.loads(match.group(0))
+    except ValueError:
+        return []
+    return [
+        call for call in calls
+        if isinstance(call, dict) and call.get("tool") in TOOLS_BY_NAME and isinstance(call.get("args", {}), dict)
+    ][:config.TOOL_MAX_CALLS]
+
+
+class ToolResultCache:
+    """Small LRU cache of tool results keyed by tool name and arguments"""
+
+    def __init__(self, max_size: int = config.TOOL_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, object]" = OrderedDict()
+
+    @staticmethod
+    def key(name: str, args: dict) -> str:
+        return f"{name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def execute_tool_calls(
+    calls: List[dict],
+    invoke: Callable[[str, dict], object],
+    pool: Executor,
+    cache: ToolResultCache,
+    timeout: float = config.TOOL_TIMEOUT
+) -> List[dict]:
+    """
+    Run independent tool calls concurrently
+
+    Args:
+        calls: [{"tool": name, "args": {...}}, ...]
+        invoke: Callable that runs one tool by name with its arguments
+        pool: Executor the calls run on
+        cache: Shared result cache
+        timeout: Seconds each call may take
+
+    Returns:
+        One result dict per call, in the order given
+    """
+    results = [None] * len(calls)
+    futures = {}
+    for index, call in enumerate(calls):
+        args = call.get("args", {})
+        key = cache.key(call["tool"], args)
+        cached = cache.get(key)
+        if cached is not None:
+            results[index] = {"tool": call["tool"], "args": args, "result": cached, "cached": True}
+        else:
+            futures[index] = (key, pool.submit(invoke, call["tool"], args))
+
+    # All calls started together, so they share one deadline
+    deadline = time.monotonic() + timeout
+    for index, (key, future) in futures.items():
+        call = calls[index]
+        result = {"tool": call["tool"], "args": call.get("args", {})}
+        try:
+            result["result"] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            cache.put(key, result["result"])
+        except FutureTimeoutError:
+            future.cancel()
+            result["error"] = f"timed out after {timeout}s"
+        except Exception as e:
+            logger.warning("Tool %s failed: %s", call["tool"], e)
+            result["error"] = str(e)
+        results[index] = result
+
+    return results
+
+
+def format_tool_results(results: List[dict]) -> str:
+    """Render tool results for the response prompt"""
+    lines = []
+    for r in results:
+        args = ", ".join(f"{k}={v}" for k, v in r["args"].items())
+        outcome = r.get("result", {"error": r.get("error")})
+        lines.append(f"- {r['tool']}({args}) -> {json.dumps(outcome, default=str)}")
+    return "\n".join(lines)
@@ -0,0 +1,144 @@
+"""
+In-process metrics for the Slack AI Bot
+
+Counters and latency summaries are kept in memory, keyed by metric name
+and optional labels, and can be read back as a snapshot.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Number of recent observations kept per series for percentiles
+SAMPLE_SIZE = 1024
+
+
+def _series_key(name: str, labels: dict) -> Tuple:
+    return (name,) + tuple(sorted(labels.items()))
+
+
+class _Summary:
+    """Running count/sum plus a window of recent samples"""
+
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class Metrics:
+    """Thread-safe registry of counters and latency summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._summaries: Dict[Tuple, _Summary] = {}
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """
+        Increase a counter
+
+        Args:
+            name: Metric name
+            value: Amount to add
+            **labels: Optional labels identifying the series
+        """
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Record an observation (usually a latency in seconds)
+
+        Args:
+            name: Metric name
+            value: Observed value
+            **labels: Optional labels identifying the series
+        """
+        key = _series_key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary()
+            summary.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the wall-clock duration of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """
+        Get the current value of every series
+
+        Returns:
+            Dictionary with "counters" and "summaries" entries
+        """
+        def label_name(key):
+            name, labels = key[0], key[1:]
+            if not labels:
+                return name
+            return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+        with self._lock:
+            counters = {label_name(k): v for k, v in self._counters.items()}
+            summaries = {
+                label_name(k): {
+                    "count": s.count,
+                    "avg": s.total / s.count if s.count else 0.0,
+                    "p50": s.percentile(0.5),
+                    "p95": s.percentile(0.95),
+                    "p99": s.percentile(0.99),
+                }
+                for k, s in self._summaries.items()
+            }
+        return {"counters": counters, "summaries": summaries}
+
+
+# Shared registry used across the bot
+metrics = Metrics()
+
+
+def start_metrics_reporter(interval: float) -> threading.Event:
+    """
+    Periodically write a metrics snapshot to the structured log
+
+    Args:
+        interval: Seconds between snapshots
+
+    Returns:
+        Event that stops the reporter when set
+    """
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(interval):
+            logger.info("metrics", extra={"metrics": metrics.snapshot()})
+
+    threading.Thread(target=report, name="metrics-reporter", daemon=True).start()
+    return stop
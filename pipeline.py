@@ -0,0 +1,111 @@
+"""
+Minimal executor for linear agent pipelines
+
+A drop-in alternative to a compiled LangGraph StateGraph for graphs that
+are a straight line of nodes. It runs the same node functions with the
+same update semantics (returned keys overwrite state, keys annotated with
+a reducer are combined with it) but keeps state in a __slots__ object
+instead of going through the graph runtime.
+"""
+
+import typing
+from typing import Callable, Dict, List, Tuple
+
+
+class PipelineState:
+    """
+    Slotted state that reads like a dict
+
+    Subclasses are generated per state schema by LinearPipeline; unset
+    fields behave like missing keys.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def keys(self) -> List[str]:
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.keys())
+        return f"{type(self).__name__}({fields})"
+
+
+def _schema_fields(schema: type) -> Tuple[Tuple[str, ...], Dict[str, Callable]]:
+    """Field names and reducers (from Annotated metadata) of a TypedDict schema"""
+    hints = typing.get_type_hints(schema, include_extras=True)
+    reducers = {}
+    for name, hint in hints.items():
+        metadata = getattr(hint, "__metadata__", ())
+        if metadata and callable(metadata[0]):
+            reducers[name] = metadata[0]
+    return tuple(hints), reducers
+
+
+class LinearPipeline:
+    """
+    Run nodes one after another over a slotted state object
+
+    Usage:
+        pipeline = LinearPipeline(AgentState, [
+            ("process_message", self._process_message),
+            ("generate_response", self._generate_response),
+        ])
+        result = pipeline.invoke({"messages": [...], ...})
+    """
+
+    def __init__(self, schema: type, nodes: List[Tuple[str, Callable]]):
+        """
+        Args:
+            schema: TypedDict describing the state (reducers via Annotated)
+            nodes: (name, function) pairs in execution order
+        """
+        fields, self.reducers = _schema_fields(schema)
+        self.state_class = type(f"{schema.__name__}Slots", (PipelineState,), {"__slots__": fields})
+        self.nodes = list(nodes)
+
+    def invoke(self, input: dict, config: dict = None) -> PipelineState:
+        """
+        Run the pipeline
+
+        Args:
+            input: Initial state values
+            config: Accepted for interface compatibility with compiled graphs
+
+        Returns:
+            Final state (supports state["key"] and state.get("key"))
+        """
+        state = self.state_class()
+        for key, value in input.items():
+            setattr(state, key, value)
+
+        reducers = self.reducers
+        for _, node in self.nodes:
+            update = node(state)
+            # A node handing back the state object itself changed it in place
+            if not update or update is state:
+                continue
+            for key, value in update.items():
+                reducer = reducers.get(key)
+                if reducer is not None and hasattr(state, key):
+                    value = reducer(getattr(state, key), value)
+                setattr(state, key, value)
+
+        return state
@@ -0,0 +1,104 @@
+"""
+Query log for answered questions
+
+Each answered query is appended as one JSON line with its normalized
+text, query type, latency and token usage, so frequent questions can be
+found later and their answers pre-generated. Once setup_logging() has
+run, lines go through the background log writer instead of being
+written by the calling thread.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+import config
+from context_compaction import count_tokens
+from log_pipeline import QUERY_LOGGER_NAME, query_log_handled
+from utils import normalize_query, parse_marketing_query
+
+
+query_logger = logging.getLogger(QUERY_LOGGER_NAME)
+
+
+class QueryLog:
+    """Append-only JSONL log of answered queries"""
+
+    def __init__(self, path: str = config.QUERY_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        query: str,
+        response: str,
+        latency: float,
+        cached: bool = False,
+        **extra
+    ) -> dict:
+        """
+        Append a query to the log
+
+        Args:
+            query: The question as asked
+            response: The answer that was returned
+            latency: Seconds taken to produce the answer
+            cached: Whether the answer came from the response store
+            **extra: Additional fields to store with the record
+
+        Returns:
+            The record that was written
+        """
+        record = {
+            "ts": time.time(),
+            "query": normalize_query(query),
+            "question": query,
+            "query_type": parse_marketing_query(query)["type"],
+            "latency": round(latency, 4),
+            "prompt_tokens": count_tokens(query),
+            "completion_tokens": count_tokens(response),
+            "cached": cached,
+            **extra,
+        }
+
+        line = json.dumps(record, ensure_ascii=False)
+
+        # In the bot the background log writer appends the line, so
+        # request threads only enqueue it
+        if query_log_handled(self.path):
+            query_logger.info(line)
+            return record
+
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+        return record
+
+    def iter_records(self, since: Optional[float] = None) -> Iterator[dict]:
+        """
+        Read records from the log
+
+        Args:
+            since: Only yield records with a timestamp at or after this time
+
+        Yields:
+            Query records, oldest first
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partially written line
+                if since is None or record.get("ts", 0) >= since:
+                    yield record
@@ -0,0 +1,222 @@
+"""
+Store of pre-generated answers keyed by normalized question
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+import config
+from utils import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+def query_similarity(a: str, b: str) -> float:
+    """
+    Word-overlap (Jaccard) similarity between two normalized queries
+
+    Args:
+        a: First normalized query
+        b: Second normalized query
+
+    Returns:
+        Similarity between 0.0 and 1.0
+    """
+    words_a, words_b = set(a.split()), set(b.split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ResponseStore:
+    """In-memory answer cache, optionally persisted to a JSON file"""
+
+    def __init__(self, path: Optional[str] = config.RESPONSE_STORE_PATH, ttl: float = config.RESPONSE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._loaded_mtime = None
+        self.reload()
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Error loading response store: %s", e)
+            return {}
+
+    def _merge(self, entries: dict):
+        """Merge entries into memory, keeping the newer answer per question"""
+        for key, entry in entries.items():
+            current = self._entries.get(key)
+            if current is None or entry["created_at"] > current["created_at"]:
+                self._entries[key] = entry
+
+    def reload(self) -> bool:
+        """
+        Pick up answers another process saved since the last load
+
+        Returns:
+            True if the file had changed and was merged in
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+
+        entries = self._read_file()
+        with self._lock:
+            self._merge(entries)
+            self._loaded_mtime = mtime
+        self.prune()
+        return True
+
+    def is_stale(self, entry: dict) -> bool:
+        """Check whether an entry is older than the TTL"""
+        return time.time() - entry["created_at"] > self.ttl
+
+    def get(self, query: str, allow_stale: bool = False) -> Optional[str]:
+        """
+        Look up a pre-generated answer
+
+        Only exact (normalized) matches are served; the warmer stores an
+        alias for each phrasing in a cluster. Near matches are left to
+        degraded mode, which tells the user the answer is a nearby one.
+
+        Args:
+            query: The question as asked
+            allow_stale: Return answers older than the TTL as well
+
+        Returns:
+            The stored answer, or None
+        """
+        entry = self._entries.get(normalize_query(query))
+        if entry is not None and (allow_stale or not self.is_stale(entry)):
+            return entry["answer"]
+        return None
+
+    def nearest(
+        self,
+        query: str,
+        min_similarity: float = config.CACHE_SIMILARITY,
+        allow_stale: bool = True
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Find the stored answer for the most similar question
+
+        Args:
+            query: The question as asked
+            min_similarity: Minimum similarity for a match
+            allow_stale: Consider answers older than the TTL as well
+
+        Returns:
+            Tuple of (answer, similarity), or None if nothing is close enough
+        """
+        key = normalize_query(query)
+        best, best_score = None, min_similarity
+        for stored_key, entry in list(self._entries.items()):
+            if not allow_stale and self.is_stale(entry):
+                continue
+            score = query_similarity(key, stored_key)
+            if score >= best_score:
+                best, best_score = entry["answer"], score
+        return (best, best_score) if best is not None else None
+
+    def needs_refresh(self, query: str) -> bool:
+        """Check whether a question is missing or stale"""
+        entry = self._entries.get(normalize_query(query))
+        return entry is None or self.is_stale(entry)
+
+    def put(self, query: str, answer: str, query_type: str = "general", aliases: Iterable[str] = ()):
+        """
+        Store an answer
+
+        Args:
+            query: The question (normalized before storing)
+            answer: The answer text
+            query_type: Type from parse_marketing_query
+            aliases: Other phrasings that get the same answer
+        """
+        entry = {
+            "answer": answer,
+            "query_type": query_type,
+            "created_at": time.time(),
+        }
+        with self._lock:
+            for key in {normalize_query(q) for q in (query, *aliases)}:
+                self._entries[key] = dict(entry)
+
+    def add_aliases(self, query: str, aliases: Iterable[str]) -> int:
+        """
+        Point phrasings without an answer of their own at an existing answer
+
+        Args:
+            query: The question whose answer is shared
+            aliases: Other phrasings of it
+
+        Returns:
+            Number of aliases added
+        """
+        with self._lock:
+            entry = self._entries.get(normalize_query(query))
+            if entry is None:
+                return 0
+            added = 0
+            for key in {normalize_query(alias) for alias in aliases}:
+                if key not in self._entries:
+                    self._entries[key] = dict(entry)
+                    added += 1
+            return added
+
+    def prune(self, max_age: float = config.RESPONSE_STORE_MAX_AGE) -> int:
+        """
+        Drop answers too old to serve even in degraded mode
+
+        Args:
+            max_age: Seconds after which an answer is dropped
+
+        Returns:
+            Number of answers dropped
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry["created_at"] < cutoff]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def save(self):
+        """Persist the store, merged with what is on disk, so warmed answers survive restarts"""
+        if not self.path:
+            return
+
+        # Other replicas may have saved since; don't overwrite their answers
+        entries = self._read_file()
+        with self._lock:
+            self._merge(entries)
+        self.prune()
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
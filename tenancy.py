@@ -0,0 +1,106 @@
+"""
+Multi-workspace support
+
+OAuth installations are persisted on local disk and cached in memory, so
+one process (one agent graph and one model pool) can serve every
+workspace that installs the app. Each workspace gets its own request
+quota and metrics labels.
+"""
+
+import os
+import threading
+import time
+
+from slack_bolt.oauth.oauth_settings import OAuthSettings
+from slack_sdk.oauth.installation_store import FileInstallationStore
+from slack_sdk.oauth.installation_store.cacheable_installation_store import CacheableInstallationStore
+from slack_sdk.oauth.state_store import FileOAuthStateStore
+
+import config
+from admission import OverloadedError
+from metrics import metrics
+
+
+class QuotaExceededError(OverloadedError):
+    """Raised when a workspace has used up its request quota"""
+
+
+def is_multi_workspace() -> bool:
+    """Multi-workspace mode is enabled by configuring OAuth credentials"""
+    return bool(os.environ.get("SLACK_CLIENT_ID"))
+
+
+def create_oauth_settings() -> OAuthSettings:
+    """
+    Build OAuth settings backed by a cached, file-persisted installation store
+
+    Returns:
+        OAuthSettings for the Bolt App
+    """
+    client_id = os.environ["SLACK_CLIENT_ID"]
+    installation_store = CacheableInstallationStore(
+        FileInstallationStore(base_dir=config.INSTALLATION_STORE_DIR, client_id=client_id)
+    )
+
+    return OAuthSettings(
+        client_id=client_id,
+        client_secret=os.environ["SLACK_CLIENT_SECRET"],
+        scopes=config.SLACK_SCOPES,
+        installation_store=installation_store,
+        state_store=FileOAuthStateStore(
+            expiration_seconds=config.OAUTH_STATE_EXPIRATION,
+            base_dir=config.OAUTH_STATE_DIR,
+            client_id=client_id
+        )
+    )
+
+
+class TenantQuota:
+    """
+    Per-workspace token bucket
+
+    Each workspace may burst up to `burst` requests and then sustain
+    `per_minute` requests per minute, so one busy workspace can't
+    monopolize the shared model pool.
+    """
+
+    def __init__(self, per_minute: float = config.TENANT_REQUESTS_PER_MINUTE, burst: int = config.TENANT_BURST):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # team_id -> (tokens, last_refill)
+
+    def allow(self, team_id: str) -> bool:
+        """
+        Take one request from a workspace's quota
+
+        Args:
+            team_id: Slack workspace ID
+
+        Returns:
+            True if the request is within quota
+        """
+        team_id = team_id or "unknown"
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(team_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[team_id] = (tokens, now)
+
+        metrics.increment("tenant.requests", team=team_id)
+        if not allowed:
+            metrics.increment("tenant.throttled", team=team_id)
+        return allowed
+
+    def check(self, team_id: str):
+        """
+        Take one request from the quota, raising if it is used up
+
+        Raises:
+            QuotaExceededError: If the workspace is over its quota
+        """
+        if not self.allow(team_id):
+            raise QuotaExceededError(f"Workspace {team_id} is over its request quota")
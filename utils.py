@@ -22,6 +22,39 @@ def format_slack_message(text: str, max_length: int = 3000) -> str:
     return f"{truncated}\n\n_[Message truncated due to length]_"
 
 
+def split_slack_message(text: str, max_length: int = 3000, max_parts: int = 5) -> list:
+    """
+    Split a long message into Slack-sized chunks on paragraph or line boundaries
+    
+    Args:
+        text: The message text to split
+        max_length: Maximum length of each chunk
+        max_parts: Maximum number of chunks; the last one is truncated
+        
+    Returns:
+        List of message chunks
+    """
+    chunks = []
+    remaining = text
+    
+    while remaining and len(chunks) < max_parts - 1 and len(remaining) > max_length:
+        # Prefer breaking between paragraphs, then lines, then words
+        cut = remaining.rfind("\n\n", 0, max_length)
+        if cut <= 0:
+            cut = remaining.rfind("\n", 0, max_length)
+        if cut <= 0:
+            cut = remaining.rfind(" ", 0, max_length)
+        if cut <= 0:
+            cut = max_length
+        chunks.append(remaining[:cut].rstrip())
+        remaining = remaining[cut:].lstrip()
+    
+    if remaining:
+        chunks.append(format_slack_message(remaining, max_length))
+    
+    return chunks
+
+
 def extract_slack_mentions(text: str) -> list:
     """
     Extract all user mentions from Slack message
@@ -62,6 +95,21 @@ def clean_slack_formatting(text: str) -> str:
     return text.strip()
 
 
+def normalize_query(text: str) -> str:
+    """
+    Normalize a question so equivalent phrasings share a cache key
+    
+    Args:
+        text: The query text
+        
+    Returns:
+        Lowercased text without Slack formatting, punctuation or extra spaces
+    """
+    text = clean_slack_formatting(text).lower()
+    text = re.sub(r"[^\w\s/%$-]", " ", text)
+    return " ".join(text.split())
+
+
 def create_slack_blocks(message: str, title: Optional[str] = None) -> list:
     """
     Create Slack Block Kit formatted message
@@ -167,19 +215,28 @@ def format_error_message(error: Exception) -> str:
     Returns:
         Formatted error message
     """
-    error_type = type(error).__name__
-    
     user_friendly_errors = {
         "TimeoutError": "⏱️ Sorry, that took too long. Please try again.",
         "RateLimitError": "🚦 I'm receiving too many requests. Please wait a moment.",
+        "OverloadedError": "🚦 I'm at capacity right now. Please try again in a few minutes.",
+        "CircuitOpenError": "🔧 My AI brain is unavailable at the moment. Please try again shortly.",
+        "QuotaExceededError": "🚦 Your workspace has reached its request limit. Please wait a minute.",
         "APIError": "🔧 I'm having trouble connecting to my AI brain. Please try again.",
         "ValueError": "❌ I couldn't understand that request. Can you rephrase?",
     }
     
-    return user_friendly_errors.get(
-        error_type,
-        f"😕 Oops! Something went wrong: {str(error)}"
-    )
+    # Subclasses of the bot's own overload errors share their parent's
+    # message; other subclasses (JSONDecodeError is a ValueError) aren't
+    # the user's fault, so only their exact class is looked up
+    error_classes = [cls.__name__ for cls in type(error).__mro__]
+    if "OverloadedError" not in error_classes:
+        error_classes = error_classes[:1]
+    for name in error_classes:
+        message = user_friendly_errors.get(name)
+        if message is not None:
+            return message
+    
+    return f"😕 Oops! Something went wrong: {str(error)}"
 
 
 def create_thread_context(messages: list, max_messages: int = 5) -> str: